@@ -0,0 +1,169 @@
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from typing import List
+
+from errors import OverloadedError, ProcessingError
+from executor import NODE_WORKERS
+from telemetry import QUEUE_DEPTH, QUEUE_REJECTED, QUEUE_RUNNING, QUEUE_WAIT
+
+
+# Highest first: a live station frame goes ahead of an editor run, which goes ahead of batch work
+PRIORITIES = ("live", "interactive", "batch")
+DEFAULT_PRIORITY = "interactive"
+
+# Flow executions running at once; each one already spreads its nodes over the node pool
+MAX_RUNNING = int(os.environ.get("VISION_MAX_RUNNING", NODE_WORKERS))
+# Executions allowed to wait for a slot before new ones are turned away
+MAX_QUEUED = int(os.environ.get("VISION_MAX_QUEUED", 32))
+# Seconds an execution may wait before it is turned away; 0 waits indefinitely
+QUEUE_TIMEOUT = float(os.environ.get("VISION_QUEUE_TIMEOUT", 30))
+
+
+class Ticket:
+    """A held execution slot; release it exactly once when the execution ends"""
+
+    def __init__(self, queue: "AdmissionQueue", priority: str):
+        self.queue = queue
+        self.priority = priority
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.queue._release(self)
+
+
+class _Waiter:
+    def __init__(self, rank: int, seq: int, priority: str, shed: bool):
+        self.rank = rank
+        self.seq = seq
+        self.priority = priority
+        self.shed = shed
+        self.enqueued = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.rank, self.seq) < (other.rank, other.seq)
+
+
+class AdmissionQueue:
+    """Bounded priority queue in front of flow execution
+
+    At most max_running executions hold a slot; the rest wait, served by priority and then
+    arrival. When max_queued are already waiting, a newcomer displaces the lowest priority,
+    most recent waiter if it outranks it, and is turned away otherwise. Waiters enqueued
+    with shed=False (items of an already admitted batch) never count against the bound and
+    are never displaced or timed out.
+    """
+
+    def __init__(self, max_running: int, max_queued: int, timeout: float):
+        self.max_running = max(1, max_running)
+        self.max_queued = max(0, max_queued)
+        self.timeout = timeout
+        self.running = 0
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        # Moving average of how long a slot is held, for the Retry-After hint
+        self._hold_time = 1.0
+
+    def _rank(self, priority: str) -> int:
+        if priority not in PRIORITIES:
+            raise ProcessingError(f"Unknown priority '{priority}', expected one of {', '.join(PRIORITIES)}")
+        return PRIORITIES.index(priority)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up for a new arrival"""
+        backlog = len(self._waiting) + 1
+        return max(1, math.ceil(self._hold_time * backlog / self.max_running))
+
+    def _sheddable(self) -> List[_Waiter]:
+        return [w for w in self._waiting if w.shed]
+
+    def _overloaded(self, priority: str, reason: str) -> OverloadedError:
+        QUEUE_REJECTED.inc(priority, reason)
+        return OverloadedError(
+            f"Server is overloaded ({reason}); retry later", priority, self.retry_after()
+        )
+
+    def _full_for(self, rank: int) -> bool:
+        sheddable = self._sheddable()
+        return len(sheddable) >= self.max_queued and (not sheddable or max(sheddable).rank <= rank)
+
+    def check(self, priority: str):
+        """Raise OverloadedError if a request of this priority would be turned away now"""
+        rank = self._rank(priority)
+        if self.running < self.max_running and not self._waiting:
+            return
+        if self._full_for(rank):
+            raise self._overloaded(priority, "queue full")
+
+    async def acquire(self, priority: str = DEFAULT_PRIORITY, shed: bool = True) -> Ticket:
+        """Wait for an execution slot; raises OverloadedError when shed and the queue is full"""
+        rank = self._rank(priority)
+        if self.running < self.max_running and not self._waiting:
+            QUEUE_WAIT.observe(priority, value=0.0)
+            return self._grant(priority)
+
+        if shed and len(self._sheddable()) >= self.max_queued:
+            if self._full_for(rank):
+                raise self._overloaded(priority, "queue full")
+            victim = max(self._sheddable())
+            victim.future.set_exception(self._overloaded(victim.priority, "displaced"))
+            self._remove(victim)
+
+        waiter = _Waiter(rank, next(self._seq), priority, shed)
+        heapq.heappush(self._waiting, waiter)
+        self._publish()
+        try:
+            timeout = self.timeout if shed and self.timeout > 0 else None
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            if waiter.future.done() and not waiter.future.exception():
+                return waiter.future.result()
+            self._remove(waiter)
+            raise self._overloaded(priority, "timed out")
+        except asyncio.CancelledError:
+            # The client went away while waiting; hand back a slot granted in the meantime
+            if waiter.future.done() and not waiter.future.cancelled() and not waiter.future.exception():
+                waiter.future.result().release()
+            else:
+                self._remove(waiter)
+            raise
+        finally:
+            QUEUE_WAIT.observe(priority, value=time.monotonic() - waiter.enqueued)
+
+    def _grant(self, priority: str) -> Ticket:
+        self.running += 1
+        QUEUE_RUNNING.set(value=self.running)
+        return Ticket(self, priority)
+
+    def _remove(self, waiter: _Waiter):
+        if waiter in self._waiting:
+            self._waiting.remove(waiter)
+            heapq.heapify(self._waiting)
+            self._publish()
+        if not waiter.future.done():
+            waiter.future.cancel()
+
+    def _release(self, ticket: Ticket):
+        self.running -= 1
+        held = time.monotonic() - ticket.started
+        self._hold_time = 0.8 * self._hold_time + 0.2 * held
+        while self._waiting and self.running < self.max_running:
+            waiter = heapq.heappop(self._waiting)
+            if not waiter.future.done():
+                waiter.future.set_result(self._grant(waiter.priority))
+        QUEUE_RUNNING.set(value=self.running)
+        self._publish()
+
+    def _publish(self):
+        depth = dict.fromkeys(PRIORITIES, 0)
+        for waiter in self._waiting:
+            depth[waiter.priority] += 1
+        for priority, count in depth.items():
+            QUEUE_DEPTH.set(priority, value=count)
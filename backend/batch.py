@@ -0,0 +1,176 @@
+import os
+import glob
+import asyncio
+import tarfile
+import zipfile
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Tuple
+
+from errors import ProcessingError
+
+
+# Batch sources must resolve inside this directory
+BATCH_ROOT = os.path.realpath(os.environ.get("VISION_BATCH_ROOT", os.getcwd()))
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+_END = object()
+
+
+class BatchItemError(Exception):
+    """Failure of one image in a batch; the batch carries on with the rest"""
+
+    def __init__(self, image: str, message: str):
+        self.image = image
+        self.message = message
+        super().__init__(message)
+
+
+def _inside_root(path: str) -> str:
+    real = os.path.realpath(path)
+    if os.path.commonpath([real, BATCH_ROOT]) != BATCH_ROOT:
+        raise ProcessingError(f"Batch source '{path}' is outside VISION_BATCH_ROOT")
+    return real
+
+
+def _is_image_name(name: str) -> bool:
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _read_item(path: str) -> Any:
+    """(path, bytes) of one matched file, or a BatchItemError so the batch goes on without it"""
+    try:
+        real = _inside_root(path)
+        return real, _read(real)
+    except (ProcessingError, OSError) as e:
+        return BatchItemError(path, getattr(e, "message", None) or str(e))
+
+
+def check_batch_source(source: str):
+    """Fail fast on a source the batch endpoint could never read"""
+    if glob.has_magic(source):
+        prefix = []
+        for part in source.split(os.sep):
+            if glob.has_magic(part):
+                break
+            prefix.append(part)
+        _inside_root(os.sep.join(prefix) or ".")
+        return
+    path = _inside_root(source)
+    if not os.path.exists(path):
+        raise ProcessingError(f"Batch source '{source}' does not exist")
+
+
+def iter_image_sources(source: str) -> Iterator[Tuple[str, bytes]]:
+    """Yield (name, encoded bytes) for every image in a directory, glob pattern, zip or tar
+
+    Files are read one at a time as the iterator advances, so only the images in flight
+    are held in memory. A file that cannot be read, or that resolves outside the batch
+    root, is yielded as a BatchItemError instead.
+    """
+    if glob.has_magic(source):
+        paths = sorted(p for p in glob.glob(source, recursive=True) if _is_image_name(p))
+        for path in paths:
+            # A match may be a symlink leading out of the root; only that image fails
+            yield _read_item(path)
+        return
+
+    path = _inside_root(source)
+    if os.path.isdir(path):
+        for root, _, files in sorted(os.walk(path)):
+            for name in sorted(files):
+                if _is_image_name(name):
+                    yield _read_item(os.path.join(root, name))
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and _is_image_name(info.filename):
+                    yield info.filename, archive.read(info)
+    elif os.path.isfile(path) and tarfile.is_tarfile(path):
+        with tarfile.open(path) as archive:
+            for member in archive:
+                if member.isfile() and _is_image_name(member.name):
+                    yield member.name, archive.extractfile(member).read()
+    else:
+        raise ProcessingError(f"Batch source '{source}' is not a directory, glob or archive")
+
+
+async def run_pipeline(
+    items: Iterator[Any],
+    decode: Callable[[Any], Awaitable[Any]],
+    compute: Callable[[Any], Awaitable[Any]],
+    encode: Callable[[Any], Awaitable[Any]],
+    workers: int,
+    queue_size: int,
+) -> AsyncIterator[Any]:
+    """Overlap decode, compute and encode stages joined by bounded queues
+
+    Each stage runs `workers` tasks; a full queue blocks the stage before it, so at most
+    roughly 3 * (workers + queue_size) items are alive at once. Outputs arrive in completion
+    order. A stage callable may return an exception instance to pass it through as output.
+    """
+    decoded = asyncio.Queue(maxsize=queue_size)
+    computed = asyncio.Queue(maxsize=queue_size)
+    encoded = asyncio.Queue(maxsize=queue_size)
+    source_lock = asyncio.Lock()
+
+    async def next_item():
+        # The item iterator does blocking file reads; keep it off the loop and serialised
+        async with source_lock:
+            try:
+                return await asyncio.to_thread(next, items, _END)
+            except Exception as e:
+                return e
+
+    async def stage(get, stage_fn, out):
+        while True:
+            item = await get()
+            if item is _END:
+                return
+            await out.put(await stage_fn(item))
+
+    async def close(tasks, out):
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await out.put(_END)
+
+    def passthrough(fn):
+        async def run(item):
+            if isinstance(item, BaseException):
+                return item
+            try:
+                return await fn(item)
+            except Exception as e:
+                return e
+        return run
+
+    def take(queue):
+        async def get():
+            item = await queue.get()
+            if item is _END:
+                # Let sibling workers see the end marker too
+                await queue.put(_END)
+            return item
+        return get
+
+    decoders = [asyncio.create_task(stage(next_item, passthrough(decode), decoded)) for _ in range(workers)]
+    computers = [asyncio.create_task(stage(take(decoded), passthrough(compute), computed)) for _ in range(workers)]
+    encoders = [asyncio.create_task(stage(take(computed), passthrough(encode), encoded)) for _ in range(workers)]
+    closers = [
+        asyncio.create_task(close(decoders, decoded)),
+        asyncio.create_task(close(computers, computed)),
+        asyncio.create_task(close(encoders, encoded)),
+    ]
+
+    try:
+        while True:
+            output = await encoded.get()
+            if output is _END:
+                break
+            yield output
+    finally:
+        for task in decoders + computers + encoders + closers:
+            task.cancel()
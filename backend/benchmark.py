@@ -0,0 +1,432 @@
+"""Micro-benchmarks for every registered node function
+
+    python benchmark.py run -o bench.json [--sizes vga,1080p] [--variants gray] [-k blur]
+    python benchmark.py compare baseline.json bench.json [--threshold 0.1]
+
+`run` times each function on synthetic grayscale and BGR scenes at every size and
+writes a JSON report; `compare` flags cases whose median slowed down beyond the
+threshold and exits non-zero if any did.
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import inspect
+import argparse
+import platform
+import contextlib
+import multiprocessing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from node_functions import REGISTRY
+from profiler import percentiles
+from registry import FunctionSpec
+
+try:
+    import resource
+except ImportError:  # Windows: cases run without a memory limit
+    resource = None
+
+
+SIZES = {"vga": (640, 480), "1080p": (1920, 1080), "12mp": (4000, 3000)}
+VARIANTS = ("gray", "bgr")
+
+# Image-shaped parameters that follow the case's variant
+IMAGE_PARAMS = {"image", "image1", "image2", "frame", "curr_frame", "prev_frame", "bg", "scene"}
+# Second operands get a shifted scene so differencing functions have work to do
+SHIFTED_PARAMS = {"image2", "prev_frame", "bg"}
+COLOR_PARAMS = {"bgr_image", "original_bgr_image"}
+CHANNEL_PARAMS = {"red_image", "green_image", "blue_image"}
+MASK_PARAMS = {"binary_image", "mask"}
+
+# Needs model weights or detections, not synthetic images
+SKIPPED_MODULES = {"ModelOperations"}
+
+# Functions that open windows and wait for the user
+INTERACTIVE_CALLS = ("cv2.imshow", "cv2.selectROI", "cv2.waitKey")
+
+
+class SkipCase(Exception):
+    pass
+
+
+def synthetic_scene(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """Grayscale gradient with filled shapes and mild noise, so thresholds and contours find structure"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 96, width, dtype=np.float32)
+    y = np.linspace(0, 64, height, dtype=np.float32)
+    image = (x[None, :] + y[:, None]).astype(np.uint8)
+    side = min(width, height)
+    for _ in range(24):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        radius = int(rng.integers(side // 40, side // 12))
+        cv2.circle(image, center, radius, int(rng.integers(150, 255)), -1)
+    for _ in range(12):
+        x0, y0 = int(rng.integers(0, width)), int(rng.integers(0, height))
+        size = int(rng.integers(side // 30, side // 8))
+        cv2.rectangle(image, (x0, y0), (x0 + size, y0 + size // 2), int(rng.integers(110, 200)), -1)
+    noise = rng.normal(0, 6, image.shape).astype(np.int16)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+class Scene:
+    """Synthetic inputs for one image size"""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.gray = synthetic_scene(width, height)
+        self.bgr = cv2.merge([self.gray, cv2.subtract(self.gray, 40), cv2.bitwise_not(self.gray)])
+        _, self.mask = cv2.threshold(self.gray, 127, 255, cv2.THRESH_BINARY)
+        contours, _ = cv2.findContours(self.mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        self.contours = sorted(contours, key=cv2.contourArea, reverse=True)
+        self.stats = cv2.connectedComponentsWithStats(self.mask)[2]
+
+    def image(self, variant: str, shifted: bool = False) -> np.ndarray:
+        image = self.bgr if variant == "bgr" else self.gray
+        return np.roll(image, 7, axis=1) if shifted else image
+
+    def point(self, fx: float, fy: float) -> Tuple[int, int]:
+        return int(self.width * fx), int(self.height * fy)
+
+    def quad(self, inset: float) -> List[Tuple[int, int]]:
+        return [
+            self.point(inset, inset),
+            self.point(1 - inset, inset),
+            self.point(1 - inset, 1 - inset),
+            self.point(inset, 1 - inset),
+        ]
+
+
+def _param_value(name: str, scene: Scene, variant: str) -> Any:
+    if name in IMAGE_PARAMS:
+        return scene.image(variant, shifted=name in SHIFTED_PARAMS)
+    if name in COLOR_PARAMS:
+        if variant != "bgr":
+            raise SkipCase("needs a BGR image")
+        return scene.bgr
+    if name in CHANNEL_PARAMS:
+        return scene.gray
+    if name in MASK_PARAMS:
+        return scene.mask
+    if name == "template":
+        image = scene.image(variant)
+        return image[scene.height // 3:scene.height // 3 + scene.height // 10,
+                     scene.width // 3:scene.width // 3 + scene.width // 10].copy()
+
+    values = {
+        "contour": lambda: scene.contours[0],
+        "contours": lambda: scene.contours,
+        "stats": lambda: scene.stats,
+        "rect": lambda: (scene.width // 4, scene.height // 4, scene.width // 2, scene.height // 2),
+        "points": lambda: scene.quad(0.2),
+        "src_points": lambda: scene.quad(0.1),
+        "dst_points": lambda: scene.quad(0.0),
+        "src_pts": lambda: scene.quad(0.1),
+        "dst_pts": lambda: scene.quad(0.0),
+        "point": lambda: scene.point(0.3, 0.6),
+        "pt1": lambda: scene.point(0.25, 0.5),
+        "pt2": lambda: scene.point(0.75, 0.5),
+        "line": lambda: (scene.point(0.1, 0.1), scene.point(0.9, 0.3)),
+        "line1": lambda: (*scene.point(0.1, 0.1), *scene.point(0.9, 0.3)),
+        "line2": lambda: (*scene.point(0.1, 0.8), *scene.point(0.9, 0.6)),
+        "real_distance": lambda: 100.0,
+        "angle": lambda: 30,
+        "flip_type": lambda: "horizontal",
+        "fx": lambda: 0.5,
+        "fy": lambda: 0.5,
+        "width": lambda: scene.width // 2,
+        "height": lambda: scene.height // 2,
+        "levels": lambda: 3,
+        "gamma": lambda: 1.5,
+        "variable1": lambda: 7.0,
+        "variable2": lambda: 3.0,
+        "a": lambda: 5.0,
+        "rounding_off": lambda: 2,
+        "X": lambda: list(range(100)),
+        "y": lambda: [2 * v + 1 for v in range(100)],
+    }
+    if name not in values:
+        raise SkipCase(f"no synthetic input for parameter '{name}'")
+    return values[name]()
+
+
+# Functions whose parameters mean something other than the shared defaults above
+FUNCTION_INPUTS: Dict[str, Callable[[Scene], Dict[str, Any]]] = {
+    "warp_affine": lambda s: {"src_pts": s.quad(0.1)[:3], "dst_pts": s.quad(0.0)[:3]},
+    "point_to_point": lambda s: {"points": [s.point(0.25, 0.25), s.point(0.75, 0.75)]},
+    "draw_distance_on_image": lambda s: {"points": [s.point(0.25, 0.25), s.point(0.75, 0.75)]},
+    "point_to_line": lambda s: {"line": (0.5, s.height * 0.1)},
+    "calculate_new_line": lambda s: {"line": (0.5, s.height * 0.1), "offset_distance": 10.0},
+    "find_angle_and_intersection": lambda s: {"line1": (0.5, 10.0), "line2": (-2.0, 40.0)},
+    "get_slope_at_certain_angle": lambda s: {"line": (s.point(0.1, 0.1), s.point(0.9, 0.3))},
+    "in_range": lambda s: {"variable1": 0, "a": 5, "variable2": 10},
+}
+
+
+def skip_reason(spec: FunctionSpec) -> Optional[str]:
+    if spec.module.split(".")[-1] in SKIPPED_MODULES:
+        return "needs a model"
+    if not spec.cacheable:
+        return "has side effects"
+    try:
+        source = inspect.getsource(spec.func)
+    except (OSError, TypeError):
+        return None
+    if any(call in source for call in INTERACTIVE_CALLS):
+        return "interactive"
+    return None
+
+
+def has_image_input(spec: FunctionSpec) -> bool:
+    image_params = IMAGE_PARAMS | COLOR_PARAMS | CHANNEL_PARAMS | MASK_PARAMS | {"template"}
+    return any(p in image_params for p in spec.params)
+
+
+def build_inputs(spec: FunctionSpec, scene: Scene, variant: str) -> Dict[str, Any]:
+    """Required parameters from the scene; parameters with defaults keep them"""
+    overrides = FUNCTION_INPUTS.get(spec.name, lambda s: {})(scene)
+    inputs = {}
+    for name in spec.params:
+        if name == "self":
+            continue
+        if name in overrides:
+            inputs[name] = overrides[name]
+        elif name not in spec.defaults or name in IMAGE_PARAMS | COLOR_PARAMS | MASK_PARAMS:
+            inputs[name] = _param_value(name, scene, variant)
+    return inputs
+
+
+def time_call(
+    spec: FunctionSpec, inputs: Dict[str, Any], min_runs: int, max_runs: int, min_time: float,
+    max_case_time: float,
+) -> List[float]:
+    """Durations of repeated calls after one warmup call"""
+    def fresh():
+        # In-place functions would otherwise accumulate drawings run over run
+        if not spec.mutates_inputs:
+            return inputs
+        return {k: v.copy() if isinstance(v, np.ndarray) else v for k, v in inputs.items()}
+
+    spec.call(fresh())
+    samples = []
+    while len(samples) < max_runs:
+        total = sum(samples)
+        if len(samples) >= min_runs and total >= min_time:
+            break
+        if samples and total >= max_case_time:
+            break
+        args = fresh()
+        started = time.perf_counter()
+        spec.call(args)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def measure_case(spec: FunctionSpec, inputs: Dict[str, Any], **timing) -> Dict[str, Any]:
+    try:
+        # Several functions print their inputs or results; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            samples = time_call(spec, inputs, **timing)
+    except MemoryError:
+        return {"status": "error", "reason": "MemoryError: exceeded the case memory limit"}
+    except Exception as e:
+        return {"status": "error", "reason": f"{type(e).__name__}: {e}"}
+    return dict(percentiles(samples), status="ok", runs=len(samples))
+
+
+def run_isolated(fn: Callable[[], Dict[str, Any]], timeout: float, memory_bytes: int) -> Dict[str, Any]:
+    """Run fn in a forked child, so a hang, crash or runaway allocation only fails its own case"""
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return fn()
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+
+    def child():
+        if resource is not None and memory_bytes:
+            resource.setrlimit(resource.RLIMIT_DATA, (memory_bytes, memory_bytes))
+        sender.send(fn())
+
+    process = context.Process(target=child, daemon=True)
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            return {"status": "error", "reason": f"timed out after {timeout:g}s"}
+        return receiver.recv()
+    except EOFError:
+        process.join()
+        return {"status": "error", "reason": f"worker exited with code {process.exitcode}"}
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        receiver.close()
+
+
+def default_memory_limit() -> int:
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 2
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+def run_benchmarks(
+    sizes: List[str], variants: List[str], pattern: Optional[str], min_runs: int = 3,
+    max_runs: int = 50, min_time: float = 0.2, max_case_time: float = 10.0,
+    case_timeout: float = 300.0, memory_bytes: Optional[int] = None, log=print,
+) -> Dict[str, Any]:
+    matcher = re.compile(pattern) if pattern else None
+    specs = [
+        spec for name, spec in sorted(REGISTRY.specs.items())
+        if not name.startswith("_") and (matcher is None or matcher.search(name))
+    ]
+    scenes = {size: Scene(*SIZES[size]) for size in sizes}
+    if memory_bytes is None:
+        memory_bytes = default_memory_limit()
+    timing = dict(min_runs=min_runs, max_runs=max_runs, min_time=min_time, max_case_time=max_case_time)
+
+    results: Dict[str, Any] = {}
+    for spec in specs:
+        module = spec.module.split(".")[-1]
+        if has_image_input(spec):
+            cases = [(size, variant) for size in sizes for variant in variants]
+        else:
+            # Scalar functions do not depend on image size
+            cases = [(None, None)]
+        for size, variant in cases:
+            key = spec.name if size is None else f"{spec.name}@{size}/{variant}"
+            result: Dict[str, Any] = {"function": spec.name, "module": module, "size": size, "variant": variant}
+            try:
+                reason = skip_reason(spec)
+                if reason:
+                    raise SkipCase(reason)
+                inputs = build_inputs(spec, scenes[size] if size else Scene(64, 48), variant or "gray")
+                result.update(
+                    run_isolated(
+                        lambda: measure_case(spec, inputs, **timing), case_timeout, memory_bytes
+                    )
+                )
+            except SkipCase as e:
+                result.update(status="skipped", reason=str(e))
+            results[key] = result
+            if result["status"] == "ok":
+                log(f"{key:60s} p50 {result['p50']:10.3f} ms  ({result['runs']} runs)")
+            else:
+                log(f"{key:60s} {result['status']}: {result['reason'].splitlines()[0]}")
+
+    statuses = [r["status"] for r in results.values()]
+    log(", ".join(f"{statuses.count(s)} {s}" for s in ("ok", "skipped", "error")))
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpuCount": cv2.getNumberOfCPUs(),
+            "cvThreads": cv2.getNumThreads(),
+            "sizes": {size: SIZES[size] for size in sizes},
+        },
+        "results": results,
+    }
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, min_ms: float
+) -> Tuple[List[str], int]:
+    """Report lines and the number of regressions between two benchmark reports"""
+    lines = []
+    for key in ("opencv", "numpy", "cpuCount", "cvThreads"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            lines.append(
+                f"note: {key} differs (baseline {baseline['meta'].get(key)}, "
+                f"current {current['meta'].get(key)})"
+            )
+
+    regressions = 0
+    for key in sorted(set(baseline["results"]) | set(current["results"])):
+        before = baseline["results"].get(key)
+        after = current["results"].get(key)
+        if before is None or after is None:
+            lines.append(f"{key:60s} {'new' if before is None else 'missing'}")
+            continue
+        if before["status"] != "ok" or after["status"] != "ok":
+            if before["status"] != after["status"]:
+                lines.append(f"{key:60s} status {before['status']} -> {after['status']}")
+            continue
+        if max(before["p50"], after["p50"]) < min_ms:
+            # Below timer noise
+            continue
+        ratio = after["p50"] / max(before["p50"], 1e-9)
+        if ratio > 1 + threshold:
+            regressions += 1
+            verdict = "SLOWER"
+        elif ratio < 1 - threshold:
+            verdict = "faster"
+        else:
+            continue
+        lines.append(
+            f"{key:60s} {verdict:6s} {before['p50']:10.3f} -> {after['p50']:10.3f} ms ({ratio:.2f}x)"
+        )
+    return lines, regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark registered node functions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="time every function and write a JSON report")
+    run.add_argument("-o", "--output", default="benchmark.json")
+    run.add_argument("--sizes", default=",".join(SIZES), help="comma-separated subset of " + ",".join(SIZES))
+    run.add_argument("--variants", default=",".join(VARIANTS))
+    run.add_argument("-k", "--filter", help="regular expression on function names")
+    run.add_argument("--min-runs", type=int, default=3)
+    run.add_argument("--max-runs", type=int, default=50)
+    run.add_argument("--min-time", type=float, default=0.2, help="seconds of samples to collect per case")
+    run.add_argument("--max-case-time", type=float, default=10.0, help="stop sampling a slow case after this many seconds")
+    run.add_argument("--case-timeout", type=float, default=300.0, help="abandon a case that runs longer than this")
+    run.add_argument("--memory-limit", type=int, help="MiB a case may allocate (default: half of RAM)")
+
+    cmp = commands.add_parser("compare", help="flag slowdowns against a baseline report")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=0.1, help="relative p50 change to report")
+    cmp.add_argument("--min-ms", type=float, default=0.05, help="ignore cases faster than this")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        sizes = args.sizes.split(",")
+        variants = args.variants.split(",")
+        unknown = [s for s in sizes if s not in SIZES] + [v for v in variants if v not in VARIANTS]
+        if unknown:
+            parser.error(f"unknown size or variant: {', '.join(unknown)}")
+        report = run_benchmarks(
+            sizes, variants, args.filter, args.min_runs, args.max_runs, args.min_time,
+            args.max_case_time, args.case_timeout,
+            args.memory_limit * 1024 * 1024 if args.memory_limit else None,
+        )
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"wrote {len(report['results'])} cases to {args.output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    lines, regressions = compare(baseline, current, args.threshold, args.min_ms)
+    for line in lines:
+        print(line)
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import json
+import asyncio
+import hashlib
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from node_cache import fingerprint_value
+
+
+def coalescing_key(graph_id: str, data: Dict[str, Any], media_type: str) -> str:
+    """Identity of a run: its graph, the fingerprint of every input and the output options"""
+    inputs = {
+        node_id: fingerprint_value(value)
+        for node_id, value in (data.get("inputValues") or {}).items()
+    }
+    options = {
+        key: value for key, value in data.items()
+        if key not in ("nodes", "edges", "inputValues", "priority", "coalesce")
+    }
+    identity = {"graph": graph_id, "inputs": inputs, "options": options, "media": media_type}
+    return hashlib.sha1(json.dumps(identity, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+class SharedStream:
+    """Lines of one producer replayed to every subscriber, late joiners included
+
+    The producer runs as its own task, so a subscriber going away does not stop the others;
+    it is cancelled only once no subscriber is left. Lines are kept until the run finishes.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator[Any],
+        on_done: Callable[[], None],
+        cleanup: Optional[Callable[[], None]] = None,
+    ):
+        self.lines = []
+        self.done = False
+        self.subscribers = 0
+        self._on_done = on_done
+        self._changed = asyncio.Event()
+        self._task = asyncio.ensure_future(self._pump(source))
+        if cleanup is not None:
+            # Runs even if the task is cancelled before the source was ever started
+            self._task.add_done_callback(lambda _: cleanup())
+
+    def _wake(self):
+        # Waiters hold the old event; a fresh one is armed for the next line
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _pump(self, source: AsyncIterator[Any]):
+        try:
+            async for line in source:
+                self.lines.append(line)
+                self._wake()
+        finally:
+            self.done = True
+            self._on_done()
+            self._wake()
+
+    def subscribe(self) -> AsyncIterator[Any]:
+        # Counted now rather than on first read, so a response that has not started yet
+        # keeps the run alive if the other subscribers leave in the meantime
+        self.subscribers += 1
+        return self._replay()
+
+    async def _replay(self) -> AsyncIterator[Any]:
+        sent = 0
+        try:
+            while True:
+                while sent < len(self.lines):
+                    yield self.lines[sent]
+                    sent += 1
+                if self.done:
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                # Forget it first so nobody joins a run that is being torn down
+                self._on_done()
+                self._task.cancel()
+
+
+class InFlightRuns:
+    """Runs currently streaming, keyed by coalescing_key, that identical requests can join"""
+
+    def __init__(self):
+        self._streams: Dict[str, SharedStream] = {}
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    def subscribe(self, key: str) -> Optional[AsyncIterator[Any]]:
+        """Lines of the run under key, or None if no such run is in flight"""
+        stream = self._streams.get(key)
+        return stream.subscribe() if stream is not None else None
+
+    def join(
+        self,
+        key: str,
+        start: Callable[[], AsyncIterator[Any]],
+        cleanup: Optional[Callable[[], None]] = None,
+    ) -> Tuple[AsyncIterator[Any], bool]:
+        """Subscribe to the run under key, starting it with start() if none is in flight
+
+        cleanup is called once a run started here has ended. Returns the line iterator and
+        whether an existing run was joined (start and cleanup are then not used).
+        """
+        lines = self.subscribe(key)
+        if lines is not None:
+            return lines, True
+
+        def forget():
+            if self._streams.get(key) is stream:
+                del self._streams[key]
+
+        stream = SharedStream(start(), forget, cleanup)
+        self._streams[key] = stream
+        return stream.subscribe(), False
@@ -0,0 +1,18 @@
+from typing import Optional
+
+
+class ProcessingError(Exception):
+    def __init__(self, message: str, node_id: Optional[str] = None):
+        self.node_id = node_id
+        self.message = message
+        super().__init__(message)
+
+
+class OverloadedError(Exception):
+    """Admission control turned a request away; retry_after is a hint in seconds"""
+
+    def __init__(self, message: str, priority: str, retry_after: int):
+        self.message = message
+        self.priority = priority
+        self.retry_after = retry_after
+        super().__init__(message)
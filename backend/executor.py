@@ -0,0 +1,302 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from errors import ProcessingError
+from flow_plan import FlowPlan
+from node_cache import estimate_bytes
+from telemetry import current_rss
+
+
+# Most cv2 calls release the GIL, so independent branches run concurrently on threads
+NODE_WORKERS = int(os.environ.get("VISION_NODE_WORKERS", os.cpu_count() or 4))
+NODE_POOL = ThreadPoolExecutor(max_workers=NODE_WORKERS, thread_name_prefix="flow-node")
+
+# Upper bound on nodes one request may have in flight, so a single wide flow
+# cannot occupy the whole pool while other requests wait
+FLOW_MAX_PARALLEL = int(os.environ.get("VISION_FLOW_MAX_PARALLEL", NODE_WORKERS))
+
+# Default time budgets in seconds for one node and for a whole flow; 0 means unlimited
+NODE_TIMEOUT = float(os.environ.get("VISION_NODE_TIMEOUT", 0))
+FLOW_TIMEOUT = float(os.environ.get("VISION_FLOW_TIMEOUT", 0))
+
+_DONE = object()
+# Wakes a waiting consumer so it picks up the deadline of a node that just started
+_TICK = object()
+
+
+async def run_blocking(func: Callable, *args) -> Any:
+    """Run a CPU-bound call on the node pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(NODE_POOL, func, *args)
+
+
+class RunMemo:
+    """Per-run values computed at most once, even when several nodes ask concurrently"""
+
+    def __init__(self):
+        self._values: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._values:
+                self._values[key] = compute()
+            return self._values[key]
+
+
+class FlowRun:
+    """Runs the function nodes of a plan, submitting each one as soon as its inputs are ready
+
+    A node output is dropped from node_values once its last consumer has finished (its
+    results are emitted by on_complete before that), unless it is listed in retain.
+    run_node(node_id, owned) also gets the upstream nodes whose output it is the last
+    reader of; it may reuse those buffers in place since nothing reads them afterwards.
+
+    node_timeouts and timeout are budgets in seconds for single nodes (from when they start)
+    and for the whole run. The consumer of completed() enforces them: the run is cancelled
+    and a ProcessingError names the node that overran. A node thread cannot be interrupted,
+    so it finishes in the background, but its result is dropped and nothing else starts.
+    """
+
+    def __init__(
+        self,
+        plan: FlowPlan,
+        node_values: Dict[str, Any],
+        run_node: Callable[[str, Set[str]], Any],
+        pool: Optional[ThreadPoolExecutor] = None,
+        max_parallel: Optional[int] = None,
+        on_complete: Optional[Callable[[str, Any], Any]] = None,
+        retain: Iterable[str] = (),
+        node_timeouts: Optional[Dict[str, float]] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.plan = plan
+        self.node_values = node_values
+        self.run_node = run_node
+        # Called on the worker thread right after a node finishes; its return
+        # value travels with the completion event (e.g. pre-encoded result lines)
+        self.on_complete = on_complete
+        self.pool = pool or NODE_POOL
+        self.max_parallel = max(1, min(max_parallel or FLOW_MAX_PARALLEL, FLOW_MAX_PARALLEL))
+        # Outputs read after the run (results encoded once everything finished)
+        self.retain = set(retain)
+        self.node_timeouts = node_timeouts or {}
+        self.timeout = timeout or None
+        self.deadline: Optional[float] = None
+        self.cancelled = False
+
+        # Bytes of node outputs currently held, their high-water mark and the process RSS peak
+        self.held_bytes = 0
+        self.peak_bytes = 0
+        self.peak_rss = 0
+        self.released = 0
+        self._sizes: Dict[str, int] = {}
+        self._consumers_left = {n: len(plan.downstream[n]) for n in plan.order}
+
+        self._lock = threading.Lock()
+        self._waiting_on = {n: len(deps) for n, deps in plan.upstream.items()}
+        self._remaining = len(plan.order)
+        self._ready = deque()
+        self._in_flight = 0
+        # Start times of nodes currently executing on a worker
+        self._running: Dict[str, float] = {}
+        self._failed = False
+        self._events = queue.Queue()
+        self._loop = None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Submit the source nodes; pass loop to consume events with completed_async"""
+        if loop is not None:
+            self._loop = loop
+            self._events = asyncio.Queue()
+        if self.timeout:
+            self.deadline = time.monotonic() + self.timeout
+        if not self.plan.order:
+            self._emit(_DONE)
+            return
+        with self._lock:
+            self._ready.extend(n for n in self.plan.order if self._waiting_on[n] == 0)
+            to_submit = self._take_ready()
+        self._submit(to_submit)
+
+    def _emit(self, event):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._events.put_nowait, event)
+        else:
+            self._events.put(event)
+
+    def _take_ready(self):
+        # Caller holds the lock
+        to_submit = []
+        while self._ready and self._in_flight < self.max_parallel:
+            node_id = self._ready.popleft()
+            to_submit.append((node_id, self._owned_inputs(node_id)))
+            self._in_flight += 1
+        return to_submit
+
+    def _owned_inputs(self, node_id: str) -> Set[str]:
+        # Caller holds the lock; every other consumer of these sources has already finished
+        return {
+            src_id for src_id in self.plan.upstream[node_id]
+            if self._consumers_left[src_id] == 1 and src_id not in self.retain
+        }
+
+    def _submit(self, to_submit):
+        # Outside the lock: add_done_callback runs inline if the future already finished
+        for node_id, owned in to_submit:
+            future = self.pool.submit(self._execute, node_id, owned)
+            future.add_done_callback(lambda f, node_id=node_id: self._finished(node_id, f))
+
+    def _execute(self, node_id: str, owned: Set[str]):
+        with self._lock:
+            if self._failed:
+                # Cancelled while queued on the pool: skip the work entirely
+                return None, None
+            self._running[node_id] = time.monotonic()
+        if node_id in self.node_timeouts:
+            self._emit(_TICK)
+        value = self.run_node(node_id, owned)
+        payload = self.on_complete(node_id, value) if self.on_complete else None
+        return value, payload
+
+    def _finished(self, node_id: str, future):
+        error = future.exception()
+        with self._lock:
+            self._in_flight -= 1
+            self._running.pop(node_id, None)
+            if self._failed:
+                return
+            if error is not None:
+                self._failed = True
+                self._emit((node_id, error, None))
+                return
+
+            value, payload = future.result()
+            self.node_values[node_id] = value
+            self._sizes[node_id] = estimate_bytes(value)
+            self.held_bytes += self._sizes[node_id]
+            self.peak_bytes = max(self.peak_bytes, self.held_bytes)
+            self.peak_rss = max(self.peak_rss, current_rss())
+            self._release_inputs_of(node_id)
+            self._remaining -= 1
+            for target in self.plan.downstream[node_id]:
+                self._waiting_on[target] -= 1
+                if self._waiting_on[target] == 0:
+                    self._ready.append(target)
+            to_submit = self._take_ready()
+
+            self._emit((node_id, None, payload))
+            if self._remaining == 0:
+                self._emit(_DONE)
+
+        self._submit(to_submit)
+
+    def _release(self, node_id: str):
+        # Caller holds the lock
+        if node_id in self.retain or node_id not in self.node_values:
+            return
+        del self.node_values[node_id]
+        self.held_bytes -= self._sizes.pop(node_id)
+        self.released += 1
+
+    def _release_inputs_of(self, node_id: str):
+        # Caller holds the lock; node_id has finished reading its inputs
+        if self._consumers_left[node_id] == 0:
+            self._release(node_id)
+        for src_id in self.plan.upstream[node_id]:
+            self._consumers_left[src_id] -= 1
+            if self._consumers_left[src_id] == 0:
+                self._release(src_id)
+
+    def cancel(self):
+        """Stop scheduling: queued nodes are skipped, running ones are left to finish unread"""
+        with self._lock:
+            if self._failed or self._remaining == 0:
+                return
+            self._failed = True
+            self.cancelled = True
+            self._ready.clear()
+
+    def _next_deadline(self) -> Optional[float]:
+        with self._lock:
+            deadlines = [
+                started + self.node_timeouts[node_id]
+                for node_id, started in self._running.items()
+                if node_id in self.node_timeouts
+            ]
+        if self.deadline is not None:
+            deadlines.append(self.deadline)
+        return min(deadlines, default=None)
+
+    def _overrun(self) -> Optional[ProcessingError]:
+        """Cancel the run if a node (or the flow) used up its budget and describe the culprit"""
+        now = time.monotonic()
+        with self._lock:
+            running = dict(self._running)
+        error = None
+        for node_id, started in sorted(running.items(), key=lambda item: item[1]):
+            budget = self.node_timeouts.get(node_id)
+            if budget is not None and now - started >= budget:
+                error = ProcessingError(f"Node timed out after {budget:g}s", node_id=node_id)
+                break
+        if error is None and self.deadline is not None and now >= self.deadline:
+            # Blame the node that has been running longest
+            slowest = min(running, key=running.get, default=None)
+            error = ProcessingError(f"Flow exceeded its {self.timeout:g}s time budget", node_id=slowest)
+        if error is not None:
+            self.cancel()
+        return error
+
+    def _wait_time(self) -> Optional[float]:
+        deadline = self._next_deadline()
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def memory(self) -> Dict[str, int]:
+        return {"peakBytes": self.peak_bytes, "peakRss": self.peak_rss, "released": self.released}
+
+    def completed(self) -> Iterator[Tuple[str, Any]]:
+        """Yield (node_id, payload) in completion order, re-raising the first node failure"""
+        while True:
+            try:
+                event = self._events.get(timeout=self._wait_time())
+            except queue.Empty:
+                error = self._overrun()
+                if error is not None:
+                    raise error
+                continue
+            if event is _TICK:
+                continue
+            if event is _DONE:
+                return
+            node_id, error, payload = event
+            if error is not None:
+                raise error
+            yield node_id, payload
+
+    async def completed_async(self) -> AsyncIterator[Tuple[str, Any]]:
+        """Async counterpart of completed() for runs started with an event loop"""
+        while True:
+            try:
+                event = await asyncio.wait_for(self._events.get(), self._wait_time())
+            except asyncio.TimeoutError:
+                error = self._overrun()
+                if error is not None:
+                    raise error
+                continue
+            if event is _TICK:
+                continue
+            if event is _DONE:
+                return
+            node_id, error, payload = event
+            if error is not None:
+                raise error
+            yield node_id, payload
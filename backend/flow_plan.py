@@ -0,0 +1,149 @@
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from errors import ProcessingError
+
+
+NODE_TYPE_FUNCTION = "functionNode"
+NODE_TYPE_INPUT = "inputNode"
+NODE_TYPE_RESULT = "resultNode"
+NODE_TYPE_IMAGE_INPUT = "imageInputNode"
+NODE_TYPE_ROI_INPUT = "roiInputNode"
+NODE_TYPE_DETECTION_RESULT = "detectionResultNode"
+
+# Nodes whose incoming edges are streamed back to the client
+SINK_NODE_TYPES = (NODE_TYPE_RESULT, NODE_TYPE_ROI_INPUT)
+
+
+class FlowPlan:
+    """Indexed, topologically ordered view of a flow graph"""
+
+    def __init__(self, nodes, incoming, order, result_edges, probe=None, fused=None, unfused=None):
+        self.nodes: Dict[str, Dict[str, Any]] = nodes
+        self.incoming: Dict[str, List[Dict[str, Any]]] = incoming
+        self.order: List[str] = order
+        self.result_edges: List[Dict[str, Any]] = result_edges
+        # Function node whose own output is streamed ("evaluate up to node X")
+        self.probe: Optional[str] = probe
+        # Chains run as one node, keyed by their last node: [(node_id, image handle), ...]
+        self.fused: Dict[str, List[Tuple[str, str]]] = fused or {}
+        # The same flow without fusion, for runs that want every node's own output
+        self.unfused: Optional["FlowPlan"] = unfused
+
+        # Function-node dependencies within the plan, used by the scheduler; a fused node
+        # depends on whatever its steps read from outside the chain
+        planned = set(order)
+        self.upstream: Dict[str, Set[str]] = {
+            node_id: {
+                e["source"]
+                for step_id in self.steps(node_id)
+                for e in incoming.get(step_id, [])
+                if e["source"] in planned
+            }
+            for node_id in order
+        }
+        self.downstream: Dict[str, List[str]] = {node_id: [] for node_id in order}
+        for node_id in order:
+            for src_id in self.upstream[node_id]:
+                self.downstream[src_id].append(node_id)
+
+        # Sink edges grouped by the function node that feeds them
+        self.result_edges_by_source: Dict[str, List[Dict[str, Any]]] = {}
+        for edge in result_edges:
+            if nodes[edge["source"]]["type"] == NODE_TYPE_FUNCTION:
+                self.result_edges_by_source.setdefault(edge["source"], []).append(edge)
+
+    def steps(self, node_id: str) -> List[str]:
+        """Graph nodes a planned node stands for: its fused chain, or just itself"""
+        return [step_id for step_id, _ in self.fused[node_id]] if node_id in self.fused else [node_id]
+
+
+def compile_flow(
+    nodes: List[Dict[str, Any]],
+    edges: List[Dict[str, Any]],
+    targets: Optional[Iterable[str]] = None,
+    evaluate_up_to: Optional[str] = None,
+) -> FlowPlan:
+    """Index the graph once and order only the function nodes the requested outputs depend on
+
+    targets restricts evaluation to the named result/ROI nodes (default: all of them);
+    evaluate_up_to computes a single function node and its dependencies.
+    """
+    node_index = {}
+    for node in nodes:
+        if node["id"] in node_index:
+            raise ProcessingError("Duplicate node id", node_id=node["id"])
+        node_index[node["id"]] = node
+
+    incoming = {}
+    outgoing = {}
+    for edge in edges:
+        for end in ("source", "target"):
+            if edge.get(end) not in node_index:
+                raise ProcessingError(
+                    f"Edge {end} '{edge.get(end)}' does not match any node",
+                    node_id=edge.get("target") if end == "source" else edge.get("source"),
+                )
+        incoming.setdefault(edge["target"], []).append(edge)
+        outgoing.setdefault(edge["source"], []).append(edge["target"])
+
+    if evaluate_up_to is not None:
+        if node_index.get(evaluate_up_to, {}).get("type") != NODE_TYPE_FUNCTION:
+            raise ProcessingError("evaluateUpTo must name a function node", node_id=evaluate_up_to)
+        roots = [evaluate_up_to]
+    else:
+        sinks = [n for n, node in node_index.items() if node["type"] in SINK_NODE_TYPES]
+        if targets is not None:
+            targets = list(targets)
+            for target in targets:
+                if target not in sinks:
+                    raise ProcessingError("Target is not a result or ROI node", node_id=target)
+            sinks = targets
+        roots = [e["source"] for sink in sinks for e in incoming.get(sink, [])]
+
+    # Demand-driven: only the roots and everything upstream of them
+    required = set()
+    stack = list(roots)
+    while stack:
+        node_id = stack.pop()
+        if node_id in required or node_index[node_id]["type"] != NODE_TYPE_FUNCTION:
+            continue
+        required.add(node_id)
+        stack.extend(e["source"] for e in incoming.get(node_id, []))
+
+    if evaluate_up_to is not None:
+        # Results that come for free from the nodes being computed anyway
+        result_edges = [
+            e for e in edges
+            if node_index[e["target"]]["type"] in SINK_NODE_TYPES and e["source"] in required
+        ]
+    else:
+        wanted = set(sinks)
+        result_edges = [e for e in edges if e["target"] in wanted]
+
+    # Kahn's algorithm restricted to the required function nodes
+    in_degree = {node_id: 0 for node_id in required}
+    for node_id in required:
+        for edge in incoming.get(node_id, []):
+            if edge["source"] in required:
+                in_degree[node_id] += 1
+
+    ready = deque(n["id"] for n in nodes if n["id"] in required and in_degree[n["id"]] == 0)
+    order = []
+    while ready:
+        node_id = ready.popleft()
+        order.append(node_id)
+        for target in outgoing.get(node_id, []):
+            if target in in_degree:
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    ready.append(target)
+
+    if len(order) != len(required):
+        cycle = sorted(n for n, degree in in_degree.items() if degree > 0)
+        raise ProcessingError(
+            f"Flow contains a cycle through nodes: {', '.join(cycle)}",
+            node_id=cycle[0],
+        )
+
+    return FlowPlan(node_index, incoming, order, result_edges, probe=evaluate_up_to)
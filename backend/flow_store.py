@@ -0,0 +1,95 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from errors import ProcessingError
+from flow_plan import FlowPlan
+from node_cache import fingerprint_value
+
+
+# Registered flows kept at once; the least recently run one is dropped first
+MAX_FLOWS = int(os.environ.get("VISION_MAX_FLOWS", 256))
+
+# Request fields that shape the plan itself; everything else is a per-run default
+GRAPH_FIELDS = ("nodes", "edges", "targets", "evaluateUpTo", "fuse")
+
+
+def graph_id_for(data: Dict[str, Any]) -> str:
+    """Id derived from the graph alone; requests with the same graph compile to the same plan"""
+    graph = {key: data.get(key) for key in GRAPH_FIELDS}
+    return hashlib.sha1(json.dumps(graph, sort_keys=True).encode()).hexdigest()
+
+
+def run_defaults(data: Dict[str, Any]) -> Dict[str, Any]:
+    """The request fields a registration keeps as per-run defaults"""
+    return {key: value for key, value in data.items() if key not in GRAPH_FIELDS}
+
+
+def flow_id_for(data: Dict[str, Any]) -> str:
+    """Id derived from the graph and its defaults, so registering the same flow twice reuses
+    its entry while the same graph registered with other defaults gets an entry of its own"""
+    defaults = run_defaults(data)
+    inputs = {
+        node_id: fingerprint_value(value)
+        for node_id, value in (defaults.pop("inputValues", None) or {}).items()
+    }
+    identity = {"graph": graph_id_for(data), "inputs": inputs, "defaults": defaults}
+    return hashlib.sha1(json.dumps(identity, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+class RegisteredFlow:
+    """A compiled plan plus the run options (input values, encodings, ...) it was registered with"""
+
+    def __init__(self, flow_id: str, plan: FlowPlan, defaults: Dict[str, Any]):
+        self.flow_id = flow_id
+        self.plan = plan
+        self.defaults = defaults
+
+    def run_request(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Overlay a run's options on the registered ones; input values merge per node
+
+        Fields that shape the plan are fixed at registration and rejected here.
+        """
+        fixed = sorted(key for key in data if key in GRAPH_FIELDS)
+        if fixed:
+            raise ProcessingError(
+                f"{', '.join(fixed)} cannot change per run; register the flow again instead"
+            )
+        merged = dict(self.defaults, **data)
+        merged["inputValues"] = dict(
+            self.defaults.get("inputValues") or {}, **(data.get("inputValues") or {})
+        )
+        return merged
+
+
+class FlowStore:
+    """Thread-safe LRU of registered flows keyed by flow id"""
+
+    def __init__(self, max_flows: int = MAX_FLOWS):
+        self.max_flows = max_flows
+        self._flows: "OrderedDict[str, RegisteredFlow]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, flow: RegisteredFlow):
+        with self._lock:
+            self._flows[flow.flow_id] = flow
+            self._flows.move_to_end(flow.flow_id)
+            while len(self._flows) > self.max_flows:
+                self._flows.popitem(last=False)
+
+    def get(self, flow_id: str) -> Optional[RegisteredFlow]:
+        with self._lock:
+            flow = self._flows.get(flow_id)
+            if flow is not None:
+                self._flows.move_to_end(flow_id)
+            return flow
+
+    def delete(self, flow_id: str) -> bool:
+        with self._lock:
+            return self._flows.pop(flow_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._flows)
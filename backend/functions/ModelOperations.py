@@ -23,8 +23,8 @@ class YoloDetection:
 
         return detected_objects
     
-    def plot_detections(self, detected_objects, image):
-        img = image.copy()
+    def plot_detections(self, detected_objects, image, *, inplace=False):
+        img = image if inplace else image.copy()
         
         for idx, obj in enumerate(detected_objects):
             bbox = obj["bbox"]
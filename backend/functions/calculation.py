@@ -297,7 +297,7 @@ class MeasurementTools:
         
         return area, (cx, cy)
 
-    def overlay_grid(image, grid_size=50, color=(0, 255, 0), thickness=1, show_labels=True):
+    def overlay_grid(image, grid_size=50, color=(0, 255, 0), thickness=1, show_labels=True, *, inplace=False):
       
         """
         Function: overlay_grid
@@ -311,7 +311,7 @@ class MeasurementTools:
         Output:
             ndarray: The input image with overlaid grid.
         """
-        output = image.copy()
+        output = image if inplace else image.copy()
         height, width = output.shape[:2]
         
         # Draw vertical lines
@@ -329,7 +329,7 @@ class MeasurementTools:
         return output
    
 
-    def overlay_calibrated_grid(image, pt1, pt2, real_distance, unit="mm", spacing=10, color=(255, 0, 0), thickness=1, show_labels=True):
+    def overlay_calibrated_grid(image, pt1, pt2, real_distance, unit="mm", spacing=10, color=(255, 0, 0), thickness=1, show_labels=True, *, inplace=False):
         """
         Function: overlay_calibrated_grid
         Description: Draws a calibrated grid based on a known real-world distance between two points.
@@ -347,7 +347,7 @@ class MeasurementTools:
         Output:
         - image with calibrated grid overlay
         """
-        output = image.copy()
+        output = image if inplace else image.copy()
         height, width = output.shape[:2]
 
         # Calculate pixels per unit
@@ -375,7 +375,7 @@ class BlobsAndConnected(GeometricOperations):
         )
         return num_labels, labels, stats, centroids
 
-    def draw_bounding_boxes(image, stats, min_area=50):
+    def draw_bounding_boxes(image, stats, min_area=50, *, inplace=False):
         """
         Function: draw_bounding_boxes
         Description: Draws bounding boxes around blobs using their statistical data.
@@ -386,7 +386,7 @@ class BlobsAndConnected(GeometricOperations):
         Output:
             ndarray: The image with bounding boxes drawn around qualifying blobs.
         """
-        output = image.copy()
+        output = image if inplace else image.copy()
         for i in range(1, stats.shape[0]):  # Skip background (index 0)
             x, y, w, h, area = stats[i]
             if area >= min_area:
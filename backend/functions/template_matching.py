@@ -97,7 +97,9 @@ class FeatureDetectionClassical(Matching):
                     block_size: int = 2,
                     ksize: int = 3,
                     k: float = 0.04,
-                    thresh: float = 0.01) -> np.ndarray:
+                    thresh: float = 0.01,
+                    *,
+                    inplace: bool = False) -> np.ndarray:
         """
         Function: detect_harris
         Description: Detects corners in an image using the Harris corner detection algorithm.
@@ -114,14 +116,16 @@ class FeatureDetectionClassical(Matching):
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY).astype(np.float32)
         dst = cv2.cornerHarris(gray, block_size, ksize, k)
         dst = cv2.dilate(dst, None)
-        out = image.copy()
+        out = image if inplace else image.copy()
         out[dst > thresh * dst.max()] = [0, 0, 255]
         return out
 
     def detect_shi_tomasi(image: np.ndarray,
                         max_corners: int = 100,
                         quality_level: float = 0.01,
-                        min_distance: float = 10) -> np.ndarray:
+                        min_distance: float = 10,
+                        *,
+                        inplace: bool = False) -> np.ndarray:
         """
         Function: detect_shi_tomasi
         Description: Detects corners in an image using the Shi-Tomasi corner detection algorithm.
@@ -136,7 +140,7 @@ class FeatureDetectionClassical(Matching):
 
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         corners = cv2.goodFeaturesToTrack(gray, max_corners, quality_level, min_distance)
-        out = image.copy()
+        out = image if inplace else image.copy()
         if corners is not None:
             for x, y in corners.reshape(-1, 2).astype(int):
                 cv2.circle(out, (x, y), 4, (0, 255, 0), -1)
@@ -179,7 +183,7 @@ class FeatureDetectionClassical(Matching):
         image = cv2.drawKeypoints(image, keypoints, None, color=(0, 255, 255))
         return image
 
-    def detect_mser(image: np.ndarray) -> np.ndarray:
+    def detect_mser(image: np.ndarray, *, inplace: bool = False) -> np.ndarray:
         """
         Function: detect_mser
         Description: Detects Maximally Stable Extremal Regions (MSERs) in an image.
@@ -191,7 +195,7 @@ class FeatureDetectionClassical(Matching):
         mser = cv2.MSER_create()
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         regions, _ = mser.detectRegions(gray)
-        out = image.copy()
+        out = image if inplace else image.copy()
         for pts in regions:
             hull = cv2.convexHull(pts.reshape(-1, 1, 2))
             cv2.polylines(out, [hull], True, (255, 0, 255), 1)
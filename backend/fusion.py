@@ -0,0 +1,79 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from flow_plan import FlowPlan
+from registry import FunctionRegistry
+
+
+def image_handle(spec) -> Optional[str]:
+    """Name of the parameter a pointwise function takes its image through"""
+    params = [p for p in spec.params if p != "self"]
+    return params[0] if params else None
+
+
+def fuse_pointwise(plan: FlowPlan, registry: FunctionRegistry) -> FlowPlan:
+    """Collapse chains of pointwise nodes into one node each, run later as a single LUT pass
+
+    A node joins the chain ending at the node feeding its image input when that node is
+    pointwise too and nothing else reads its output (no other node, result or probe). The
+    fused node keeps the id of the chain's last node, so results and caching are unchanged.
+    """
+    consumers = Counter(e["source"] for edges in plan.incoming.values() for e in edges)
+    chains: Dict[str, List] = {}
+
+    for node_id in plan.order:
+        spec = registry.get(plan.nodes[node_id]["data"].get("func"))
+        if spec is None or not spec.pointwise:
+            continue
+        handle = image_handle(spec)
+        image_edges = [e for e in plan.incoming.get(node_id, []) if e.get("targetHandle") == handle]
+        if len(image_edges) != 1:
+            continue
+        src_id = image_edges[0]["source"]
+        if src_id in chains and consumers[src_id] == 1 and src_id != plan.probe:
+            chains[node_id] = chains.pop(src_id) + [(node_id, handle)]
+        else:
+            chains[node_id] = [(node_id, handle)]
+
+    fused = {last: chain for last, chain in chains.items() if len(chain) > 1}
+    if not fused:
+        return plan
+    inner = {step_id for chain in fused.values() for step_id, _ in chain[:-1]}
+    return FlowPlan(
+        plan.nodes,
+        plan.incoming,
+        [n for n in plan.order if n not in inner],
+        plan.result_edges,
+        probe=plan.probe,
+        fused=fused,
+        unfused=plan,
+    )
+
+
+def chain_lut(
+    registry: FunctionRegistry, steps: List[Tuple[str, str, Dict[str, Any]]]
+) -> Optional[np.ndarray]:
+    """Compose (func, image handle, other inputs) steps into one 256-entry table
+
+    Each function is run over the 256 possible uint8 values, so the table reproduces its
+    exact rounding and saturation. None if a step fails or does not map uint8 to uint8.
+    """
+    lut = np.arange(256, dtype=np.uint8).reshape(1, 256)
+    for func_name, handle, inputs in steps:
+        try:
+            lut = registry.get(func_name).call(dict(inputs, **{handle: lut}))
+        except Exception:
+            return None
+        if not (isinstance(lut, np.ndarray) and lut.dtype == np.uint8 and lut.shape == (1, 256)):
+            return None
+    return lut
+
+
+def apply_lut(image: np.ndarray, lut: np.ndarray, in_place: bool = False) -> np.ndarray:
+    """One pass over the image; in_place reuses its buffer (the caller owns it)"""
+    if in_place and image.flags.writeable:
+        return cv2.LUT(image, lut, dst=image)
+    return cv2.LUT(image, lut)
@@ -0,0 +1,88 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+IMAGE_STORE_BYTES = int(os.environ.get("VISION_IMAGE_STORE_BYTES", 1024 * 1024 * 1024))
+IMAGE_TTL_SECONDS = float(os.environ.get("VISION_IMAGE_TTL", 600))
+
+# Input values starting with this prefix refer to an uploaded image
+IMAGE_REF_PREFIX = "imageref:"
+
+
+def is_image_ref(value) -> bool:
+    return isinstance(value, str) and value.startswith(IMAGE_REF_PREFIX)
+
+
+def image_ref_for(encoded: bytes) -> str:
+    """Reference derived from the uploaded bytes, so re-uploading a file reuses its entry"""
+    return IMAGE_REF_PREFIX + hashlib.sha1(encoded).hexdigest()
+
+
+class ImageStore:
+    """Decoded images kept in memory between requests, bounded in bytes and expired by TTL"""
+
+    def __init__(self, max_bytes: int = IMAGE_STORE_BYTES, ttl: float = IMAGE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        # Caller holds the lock
+        expired = [ref for ref, (_, expires_at) in self._entries.items() if expires_at <= now]
+        for ref in expired:
+            self._drop(ref)
+
+    def _drop(self, ref: str):
+        image, _ = self._entries.pop(ref)
+        self.total_bytes -= image.nbytes
+
+    def put(self, ref: str, image: np.ndarray) -> bool:
+        """Store image under ref; returns False if it can never fit the budget"""
+        if image.nbytes > self.max_bytes:
+            return False
+        image.flags.writeable = False
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if ref in self._entries:
+                self._drop(ref)
+            self._entries[ref] = (image, now + self.ttl)
+            self.total_bytes += image.nbytes
+            while self.total_bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+        return True
+
+    def get(self, ref: str) -> Optional[np.ndarray]:
+        """Return the image and refresh its TTL, or None if unknown or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(ref)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                self._drop(ref)
+                return None
+            self._entries[ref] = (entry[0], now + self.ttl)
+            self._entries.move_to_end(ref)
+            return entry[0]
+
+    def __contains__(self, ref: str) -> bool:
+        return self.get(ref) is not None
+
+    def delete(self, ref: str) -> bool:
+        with self._lock:
+            if ref not in self._entries:
+                return False
+            self._drop(ref)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,85 @@
+import time
+import asyncio
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+class LatestFrameSlot:
+    """Single-slot mailbox: a frame not yet taken is replaced (dropped) by a newer one"""
+
+    def __init__(self):
+        self.dropped = 0
+        self.closed = False
+        self._frame = None
+        self._event = asyncio.Event()
+
+    @property
+    def pending(self) -> int:
+        return 0 if self._frame is None else 1
+
+    def put(self, frame: Any):
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self._event.set()
+
+    def close(self):
+        self.closed = True
+        self._event.set()
+
+    async def take(self) -> Optional[Any]:
+        """Wait for the newest frame; None once the slot is closed and empty"""
+        while self._frame is None:
+            if self.closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        frame, self._frame = self._frame, None
+        return frame
+
+
+class StreamStats:
+    """Per-connection counters plus input/output rates over a sliding window"""
+
+    def __init__(self, window: float = 2.0):
+        self.window = window
+        self.received = 0
+        self.processed = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.last_latency = 0.0
+        self._received_at: deque = deque()
+        self._processed_at: deque = deque()
+
+    def _rate(self, stamps: deque, now: float) -> float:
+        while stamps and now - stamps[0] > self.window:
+            stamps.popleft()
+        if len(stamps) < 2:
+            return 0.0
+        return (len(stamps) - 1) / max(stamps[-1] - stamps[0], 1e-6)
+
+    def frame_received(self):
+        self.received += 1
+        self._received_at.append(time.monotonic())
+
+    def frame_done(self, received_at: float, failed: bool = False):
+        now = time.monotonic()
+        if failed:
+            self.errors += 1
+        else:
+            self.processed += 1
+        self.last_latency = now - received_at
+        self._processed_at.append(now)
+
+    def snapshot(self, slot: LatestFrameSlot) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": slot.dropped,
+            "errors": self.errors,
+            "queueDepth": slot.pending + self.in_flight,
+            "inputFps": round(self._rate(self._received_at, now), 2),
+            "outputFps": round(self._rate(self._processed_at, now), 2),
+            "latencyMs": round(self.last_latency * 1000, 2),
+        }
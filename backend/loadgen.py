@@ -0,0 +1,353 @@
+"""Load generator driving /execute_flow with synthetic flows built from the function registry
+
+    python loadgen.py --start-server --concurrency 8 --duration 30 --flows chain,fanout
+    python loadgen.py --url http://127.0.0.1:8000 --requests 500 --flows yolo --yolo-model yolov8n.pt
+
+Everything runs locally: the input image is synthetic and YOLO flows need a local weights file.
+"""
+import io
+import os
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import contextlib
+import subprocess
+import http.client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+
+from benchmark import SIZES, Scene, run_isolated, skip_reason
+from node_functions import REGISTRY
+from profiler import percentiles
+from wire import is_image_array
+
+
+FLOW_SHAPES = ("chain", "fanout", "yolo")
+
+
+def _probe(spec, image: np.ndarray) -> Dict[str, Any]:
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            value = spec.call({"image": image.copy()})
+            elapsed = time.perf_counter() - started
+    except Exception as e:
+        return {"status": "error", "reason": str(e)}
+    if not is_image_array(value):
+        return {"status": "error", "reason": "output is not an image"}
+    # Same shape and dtype in and out: safe to chain into any other such function
+    return {"status": "ok", "chainable": value.shape == image.shape and value.dtype == image.dtype, "seconds": elapsed}
+
+
+def image_functions(max_node_ms: float, log=print) -> Tuple[List[str], List[str]]:
+    """(chainable, image-producing) functions that take one BGR image and need nothing else"""
+    image = Scene(320, 240).bgr
+    chainable, producing = [], []
+    for name, spec in sorted(REGISTRY.specs.items()):
+        required = [p for p in spec.params if p != "self" and p not in spec.defaults]
+        if name.startswith("_") or required != ["image"] or skip_reason(spec):
+            continue
+        result = run_isolated(lambda: _probe(spec, image), timeout=10, memory_bytes=1 << 30)
+        if result["status"] != "ok" or result["seconds"] * 1000 > max_node_ms:
+            continue
+        producing.append(name)
+        if result["chainable"]:
+            chainable.append(name)
+    log(f"probed registry: {len(chainable)} chainable, {len(producing)} image-producing functions")
+    return chainable, producing
+
+
+def _function_node(node_id: str, func: str) -> Dict[str, Any]:
+    return {"id": node_id, "type": "functionNode", "data": {"func": func}}
+
+
+def chain_flow(functions: List[str]) -> Dict[str, Any]:
+    """image -> f1 -> f2 -> ... -> result"""
+    nodes = [{"id": "img", "type": "imageInputNode", "data": {}}]
+    edges = []
+    previous = "img"
+    for index, func in enumerate(functions):
+        node_id = f"f{index}"
+        nodes.append(_function_node(node_id, func))
+        edges.append({"source": previous, "target": node_id, "targetHandle": "image"})
+        previous = node_id
+    nodes.append({"id": "result", "type": "resultNode", "data": {}})
+    edges.append({"source": previous, "target": "result"})
+    return {"nodes": nodes, "edges": edges}
+
+
+def fanout_flow(functions: List[str]) -> Dict[str, Any]:
+    """image -> each function -> its own result"""
+    nodes = [{"id": "img", "type": "imageInputNode", "data": {}}]
+    edges = []
+    for index, func in enumerate(functions):
+        nodes.append(_function_node(f"f{index}", func))
+        nodes.append({"id": f"r{index}", "type": "resultNode", "data": {}})
+        edges.append({"source": "img", "target": f"f{index}", "targetHandle": "image"})
+        edges.append({"source": f"f{index}", "target": f"r{index}"})
+    return {"nodes": nodes, "edges": edges}
+
+
+def yolo_flow(model_path: str, post: List[str]) -> Dict[str, Any]:
+    """image -> YOLO -> plotted detections -> result, with a preprocessing branch alongside"""
+    flow = fanout_flow(post)
+    flow["nodes"] += [
+        {"id": "model", "type": "inputNode", "data": {}},
+        _function_node("detect", "object_detection_yolo"),
+        _function_node("plot", "plot_detections"),
+        {"id": "detections", "type": "resultNode", "data": {}},
+    ]
+    flow["edges"] += [
+        {"source": "model", "target": "detect", "targetHandle": "model"},
+        {"source": "img", "target": "detect", "targetHandle": "image"},
+        {"source": "detect", "target": "plot", "targetHandle": "detected_objects"},
+        {"source": "img", "target": "plot", "targetHandle": "image"},
+        {"source": "plot", "target": "detections"},
+    ]
+    flow["inputValues"] = {"model": model_path}
+    return flow
+
+
+def build_flows(args, log=print) -> Dict[str, Dict[str, Any]]:
+    chainable, producing = image_functions(args.max_node_ms, log)
+    rng = random.Random(args.seed)
+    flows = {}
+    for shape in args.flows:
+        if shape == "chain":
+            flows[shape] = chain_flow(rng.sample(chainable, min(args.chain_length, len(chainable))))
+        elif shape == "fanout":
+            flows[shape] = fanout_flow(rng.sample(producing, min(args.fanout, len(producing))))
+        elif shape == "yolo":
+            flows[shape] = yolo_flow(args.yolo_model, rng.sample(chainable, min(2, len(chainable))))
+    return flows
+
+
+def encoded_image(size: str) -> str:
+    ok, png = cv2.imencode(".png", Scene(*SIZES[size]).bgr)
+    return "data:image/png;base64," + base64.b64encode(png.tobytes()).decode()
+
+
+class LoadClient:
+    """One keep-alive connection per worker thread"""
+
+    def __init__(self, url: str, timeout: float):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None, content_type: str = "application/json"):
+        connection = self._connection()
+        try:
+            connection.request(method, path, body=body, headers={"Content-Type": content_type})
+            return connection.getresponse()
+        except (OSError, http.client.HTTPException):
+            # Stale keep-alive connection; the next request reconnects
+            connection.close()
+            self._local.connection = None
+            raise
+
+    def execute(self, body: bytes) -> Dict[str, Any]:
+        """Run one flow; returns latency, time to first line and the failure kind if any"""
+        started = time.perf_counter()
+        first_line = None
+        try:
+            response = self.request("POST", "/execute_flow", body)
+            if response.status != 200:
+                response.read()
+                return {"error": f"http {response.status}", "latency": time.perf_counter() - started}
+            outcome = "incomplete stream"
+            for line in response:
+                if first_line is None:
+                    first_line = time.perf_counter() - started
+                message = json.loads(line)
+                if "error" in message:
+                    outcome = "stream error"
+                elif message.get("message") == "All results processed" and outcome == "incomplete stream":
+                    outcome = None
+            result = {"latency": time.perf_counter() - started, "firstResult": first_line}
+            if outcome:
+                result["error"] = outcome
+            return result
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            return {"error": type(e).__name__, "latency": time.perf_counter() - started}
+
+
+def upload_image(client: LoadClient, data_url: str) -> str:
+    response = client.request("POST", "/images", json.dumps({"image": data_url}).encode())
+    body = json.loads(response.read())
+    if response.status != 200:
+        raise SystemExit(f"image upload failed: {body}")
+    return body["imageId"]
+
+
+def run_load(
+    client: LoadClient, bodies: Dict[str, bytes], concurrency: int, duration: Optional[float],
+    requests: Optional[int], warmup: int,
+) -> Dict[str, Any]:
+    shapes = list(bodies)
+    counter = iter(range(sys.maxsize))
+    lock = threading.Lock()
+    samples: Dict[str, List[Dict[str, Any]]] = {shape: [] for shape in shapes}
+
+    for index in range(warmup):
+        client.execute(bodies[shapes[index % len(shapes)]])
+
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    def worker():
+        while True:
+            with lock:
+                index = next(counter)
+            if requests is not None and index >= requests:
+                return
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            shape = shapes[index % len(shapes)]
+            sample = client.execute(bodies[shape])
+            with lock:
+                samples[shape].append(sample)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    report = {"concurrency": concurrency, "seconds": round(elapsed, 3), "flows": {}}
+    everything = [s for shape_samples in samples.values() for s in shape_samples]
+    for name, group in list(samples.items()) + [("all", everything)]:
+        if not group:
+            continue
+        ok = [s for s in group if "error" not in s]
+        errors: Dict[str, int] = {}
+        for s in group:
+            if "error" in s:
+                errors[s["error"]] = errors.get(s["error"], 0) + 1
+        entry = {
+            "requests": len(group),
+            "throughput": round(len(ok) / elapsed, 2),
+            "errorRate": round(1 - len(ok) / len(group), 4),
+            "errors": errors,
+        }
+        if ok:
+            entry["latencyMs"] = percentiles([s["latency"] for s in ok])
+            entry["firstResultMs"] = percentiles([s["firstResult"] for s in ok])
+        report["flows"][name] = entry
+    return report
+
+
+def start_server(port: int, timeout: float = 60.0) -> subprocess.Popen:
+    """Start `uvicorn main:app` next to this file and wait until it answers"""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"server exited with code {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/function_list")
+            connection.getresponse().read()
+            return server
+        except OSError:
+            time.sleep(0.5)
+    server.kill()
+    raise SystemExit("server did not start in time")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Drive /execute_flow with synthetic flows")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--start-server", action="store_true", help="run uvicorn main:app on the --url port for the test")
+    parser.add_argument("--flows", default="chain,fanout", help="comma-separated mix of " + ",".join(FLOW_SHAPES))
+    parser.add_argument("--chain-length", type=int, default=6)
+    parser.add_argument("--fanout", type=int, default=6)
+    parser.add_argument("--yolo-model", help="local YOLO weights file, required for yolo flows")
+    parser.add_argument("--size", default="vga", choices=list(SIZES))
+    parser.add_argument("--image-ref", action="store_true", help="upload the image once and send its id")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run (ignored with --requests)")
+    parser.add_argument("--requests", type=int, help="total requests instead of a duration")
+    parser.add_argument("--warmup", type=int, default=4, help="unmeasured requests before the run")
+    parser.add_argument("--max-node-ms", type=float, default=50.0, help="leave out functions slower than this on a 320x240 probe")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request socket timeout")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--result-format", default="jpeg", help="resultEncoding format sent with every flow")
+    parser.add_argument("--coalesce", action="store_true", help="let concurrent identical requests share one run")
+    parser.add_argument("--use-cache", action="store_true", help="let requests be served from the node result cache")
+    parser.add_argument("-o", "--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    args.flows = args.flows.split(",")
+    unknown = [f for f in args.flows if f not in FLOW_SHAPES]
+    if unknown:
+        parser.error(f"unknown flow shape: {', '.join(unknown)}")
+    if "yolo" in args.flows and not (args.yolo_model and os.path.isfile(args.yolo_model)):
+        parser.error("yolo flows need --yolo-model pointing at a local weights file")
+
+    flows = build_flows(args, log=lambda m: print(m, file=sys.stderr))
+    server = start_server(urlsplit(args.url).port or 80) if args.start_server else None
+    try:
+        client = LoadClient(args.url, args.timeout)
+        image = encoded_image(args.size)
+        if args.image_ref:
+            image = upload_image(client, image)
+        bodies = {}
+        for shape, flow in flows.items():
+            # Every request repeats the same input: without these, all but the first would
+            # measure cache lookups or a shared run instead of executing the flow
+            payload = dict(
+                flow,
+                resultEncoding={"format": args.result_format},
+                coalesce=args.coalesce,
+                useCache=args.use_cache,
+            )
+            payload["inputValues"] = dict(flow.get("inputValues", {}), img=image)
+            bodies[shape] = json.dumps(payload).encode()
+
+        report = run_load(
+            client, bodies, args.concurrency, None if args.requests else args.duration,
+            args.requests, args.warmup,
+        )
+        report["size"] = args.size
+        report["imageRef"] = args.image_ref
+        report["coalesce"] = args.coalesce
+        report["useCache"] = args.use_cache
+        report["flowFunctions"] = {
+            shape: [n["data"]["func"] for n in flow["nodes"] if n["type"] == "functionNode"]
+            for shape, flow in flows.items()
+        }
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    text = json.dumps(report, indent=1)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
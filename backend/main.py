@@ -1,48 +1,74 @@
+import os
 import json
+import math
 import base64
 import asyncio
+import itertools
+import threading
+import time
+import uuid
 import inspect
 from types import FunctionType
 from ultralytics import YOLO
-from functions import  (imageFiltering, colorSpaceOperations, 
-                        geometric, calculation, contourAnalysis, 
-                        imageArithmetics, imageEnhancement, visualization, 
-                        roi,ArithmeticOperations, template_matching,ModelOperations
-                        )
 import numpy as np
 from io import BytesIO
+from collections import Counter
 from pydantic import BaseModel
-from typing import Dict, List, Any, Optional
-from fastapi.responses import JSONResponse, StreamingResponse
-from fastapi import FastAPI, HTTPException, Request
+from typing import Dict, List, Any, Optional, Set, Tuple
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from PIL import Image
 from fastapi.middleware.cors import CORSMiddleware
 from dic_gen import get_class_info
+from errors import OverloadedError, ProcessingError
+from node_functions import MODULES, REGISTRY
+from image_store import ImageStore, image_ref_for, is_image_ref
+from node_cache import NodeResultCache, fingerprint_value, node_fingerprint
+from process_pool import PROCESS_WORKERS, ProcessNodeRunner
+from wire import (FRAMES_MEDIA_TYPE, EncodingOptions, decode_binary_input,
+                  encode_image, is_image_array, iter_frames, payload_fingerprint,
+                  writer_for, FrameWriter, NdjsonWriter)
+from batch import BatchItemError, check_batch_source, iter_image_sources, run_pipeline
+from executor import FLOW_TIMEOUT, NODE_TIMEOUT, NODE_WORKERS, FlowRun, RunMemo, run_blocking
+from flow_plan import (FlowPlan, compile_flow, NODE_TYPE_FUNCTION, NODE_TYPE_IMAGE_INPUT,
+                       NODE_TYPE_INPUT, NODE_TYPE_ROI_INPUT, NODE_TYPE_RESULT)
+from fusion import apply_lut, chain_lut, fuse_pointwise
+from flow_store import FlowStore, RegisteredFlow, flow_id_for, graph_id_for, run_defaults
+from live import LatestFrameSlot, StreamStats
+from profiler import MAX_PROFILE_RUNS, FlowProfile
+from admission import (DEFAULT_PRIORITY, MAX_QUEUED, MAX_RUNNING, QUEUE_TIMEOUT,
+                       AdmissionQueue)
+from coalesce import InFlightRuns, coalescing_key
+from telemetry import (FLOW_COALESCED, FLOW_PEAK_BYTES, FLOW_SECONDS, METRICS, NODE_CACHE, NODE_ERRORS,
+                       NodeTelemetry, record_node)
 
 
-# List of modules containing functions to be exposed
-MODULES = [
-    ArithmeticOperations,
-    imageFiltering,
-    colorSpaceOperations,
-    geometric,
-    calculation,
-    contourAnalysis,
-    imageEnhancement,
-    imageArithmetics,
-    visualization,
-    roi,
-    template_matching,
-    ModelOperations
-]
-
-
-NODE_TYPE_FUNCTION = "functionNode"
-NODE_TYPE_INPUT = "inputNode"
-NODE_TYPE_RESULT = "resultNode"
-NODE_TYPE_IMAGE_INPUT = "imageInputNode"
-NODE_TYPE_ROI_INPUT = "roiInputNode"
-NODE_TYPE_DETECTION_RESULT = "detectionResultNode"
+# Node outputs shared across requests, keyed by content fingerprint
+RESULT_CACHE = NodeResultCache()
+
+# Decoded uploads that flows reference by id instead of embedding base64
+IMAGE_STORE = ImageStore()
+
+# Full-resolution image results behind the streamed previews, keyed "<run id>/<result node id>"
+RESULTS_STORE = ImageStore(
+    max_bytes=int(os.environ.get("VISION_RESULTS_STORE_BYTES", 512 * 1024 * 1024))
+)
+
+# Flows registered with POST /flows, run by id with input values only
+FLOW_STORE = FlowStore()
+
+# Streamed runs in flight; an identical request subscribes to one instead of recomputing
+IN_FLIGHT = InFlightRuns()
+
+# Bounded, prioritised gate in front of every flow execution
+ADMISSION = AdmissionQueue(MAX_RUNNING, MAX_QUEUED, QUEUE_TIMEOUT)
+
+PROCESS_RUNNER = None
+if PROCESS_WORKERS > 0:
+    PROCESS_RUNNER = ProcessNodeRunner(
+        spec.module for spec in REGISTRY.specs.values() if spec.prefer_process
+    )
+
 
 app = FastAPI()
 app.add_middleware(
@@ -54,6 +80,12 @@ app.add_middleware(
 )
 
 
+@app.on_event("shutdown")
+def shutdown_workers():
+    if PROCESS_RUNNER is not None:
+        PROCESS_RUNNER.shutdown()
+
+
 class Node(BaseModel):
     id: str
     type: str
@@ -77,12 +109,6 @@ class ErrorResponse(BaseModel):
     node_id: Optional[str] = None
     details: Optional[Dict[str, Any]] = None
 
-class ProcessingError(Exception):
-    def __init__(self, message: str, node_id: Optional[str] = None):
-        self.node_id = node_id
-        self.message = message
-        super().__init__(message)
-
 
 @app.exception_handler(ProcessingError)
 async def processing_error_handler(request: Request, exc: ProcessingError):
@@ -94,6 +120,17 @@ async def processing_error_handler(request: Request, exc: ProcessingError):
         ).dict()
     )
 
+@app.exception_handler(OverloadedError)
+async def overloaded_error_handler(request: Request, exc: OverloadedError):
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+        content=ErrorResponse(
+            error=exc.message,
+            details={"priority": exc.priority, "retryAfter": exc.retry_after}
+        ).dict()
+    )
+
 @app.exception_handler(Exception)
 async def generic_error_handler(request: Request, exc: Exception):
     return JSONResponse(
@@ -104,192 +141,947 @@ async def generic_error_handler(request: Request, exc: Exception):
         ).dict()
     )
 
-def decode_base64_image(base64_string: str) -> np.ndarray:
-    """Decode base64 image string to numpy array"""
+def decode_image_bytes(img_bytes: bytes) -> np.ndarray:
+    """Decode encoded image bytes (PNG, JPEG, ...) to numpy array"""
     try:
-        if base64_string.startswith("data:image"):
-            base64_string = base64_string.split(",")[1]
-        img_bytes = base64.b64decode(base64_string)
         img = Image.open(BytesIO(img_bytes))
         return np.array(img)
     except Exception:
         raise ProcessingError("Invalid Image data")
 
 
-def processing_to_send_result(value: Any) -> str:
-    """Encode various types to base64 or JSON strings"""
+def base64_image_bytes(base64_string: str) -> bytes:
+    """Strip an optional data URL header and base64-decode"""
     try:
-        if isinstance(value, np.ndarray):
-            image = Image.fromarray(value)
-            buffered = BytesIO()
-            image.save(buffered, format="JPEG")
-            return "data:image/jpeg;base64," + base64.b64encode(buffered.getvalue()).decode()
-
-        if isinstance(value, (int, float, str)):
-            return str(value)
-
-        if isinstance(value, (list, dict)):
-            def convert(item):
-                if isinstance(item, np.ndarray):
-                    return item.tolist()
-                return item
-
-            if isinstance(value, list):
-                converted = [convert(i) for i in value]
-            else:
-                converted = {k: convert(v) for k, v in value.items()}
-                
-            return json.dumps(converted)
-
-        return str(value)
+        if base64_string.startswith("data:image"):
+            base64_string = base64_string.split(",")[1]
+        return base64.b64decode(base64_string)
     except Exception:
-        raise ProcessingError("Failed to convert result")
+        raise ProcessingError("Invalid Image data")
 
-@app.post("/execute_flow")
-async def execute_flow(request: Request):
+
+def decode_base64_image(base64_string: str) -> np.ndarray:
+    """Decode base64 image string to numpy array"""
+    return decode_image_bytes(base64_image_bytes(base64_string))
+
+
+def resolve_image_refs(input_values: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace uploaded-image references with their stored arrays"""
+    resolved = dict(input_values)
+    for node_id, value in input_values.items():
+        if is_image_ref(value):
+            image = IMAGE_STORE.get(value)
+            if image is None:
+                raise ProcessingError("Unknown or expired image id", node_id=node_id)
+            resolved[node_id] = image
+    return resolved
+
+
+def read_only(value: Any) -> Any:
+    """A read-only view of a writable ndarray, so a consumer cannot change what others read"""
+    if isinstance(value, np.ndarray) and value.flags.writeable:
+        value = value.view()
+        value.flags.writeable = False
+    return value
+
+
+def run_function_node(func_name: str, input_dict: Dict[str, Any], inplace: bool = False) -> Any:
+    """Call the registered function for func_name with the node's inputs
+
+    inplace lets functions that support it draw on their input arrays instead of a copy;
+    only pass it when this node owns every one of them.
+    """
+    spec = REGISTRY.get(func_name)
+    if spec is None:
+        print(f"Error processing {func_name}: unknown function")
+        return None
+    if spec.mutates_inputs:
+        # Shared and cached values are read-only; give in-place functions their own copy
+        input_dict = {
+            k: v.copy() if isinstance(v, np.ndarray) and not v.flags.writeable else v
+            for k, v in input_dict.items()
+        }
     try:
-        data = await request.json()
-        nodes = data.get("nodes", [])
-        edges = data.get("edges", [])
-        inputValues = data.get("inputValues", {})
-        node_values = dict(inputValues)
-        processed_nodes = set()
-    
+        if spec.prefer_process and PROCESS_RUNNER is not None:
+            return PROCESS_RUNNER.call(func_name, input_dict)
+        return spec.call(input_dict, inplace=inplace)
+    except Exception as e:
+        NODE_ERRORS.inc(func_name)
+        print(f"Error processing {func_name}: {e}")
+        return None
 
-        edge_map = {}
+
+def fingerprint_plan(plan: FlowPlan, input_values: Dict[str, Any]) -> Dict[str, str]:
+    """Cache key of every planned node, derived from its function and its inputs' keys"""
+    fingerprints = {}
+    # A fused chain gets the key its last node would have had unfused, step by step
+    for node_id in (step_id for planned in plan.order for step_id in plan.steps(planned)):
+        func_name = plan.nodes[node_id]["data"].get("func")
+        spec = REGISTRY.get(func_name)
+        if spec is None or not spec.cacheable:
+            # Unique per run, so neither it nor anything downstream is reused
+            fingerprints[node_id] = uuid.uuid4().hex
+            continue
+        inputs = {}
+        for edge in plan.incoming.get(node_id, []):
+            src_id = edge["source"]
+            if src_id not in fingerprints:
+                fingerprints[src_id] = fingerprint_value(input_values.get(src_id))
+            inputs[edge.get("targetHandle") or src_id] = fingerprints[src_id]
+        fingerprints[node_id] = node_fingerprint(func_name, inputs)
+    return fingerprints
+
+
+def result_header(edge: Dict[str, Any], plan: FlowPlan) -> Dict[str, Any]:
+    """Stream header identifying the result or ROI node an edge feeds"""
+    target_type = plan.nodes[edge["target"]]["type"]
+    key = NODE_TYPE_ROI_INPUT if target_type == NODE_TYPE_ROI_INPUT else NODE_TYPE_RESULT
+    return {key: edge["target"]}
+
+
+async def read_flow_request(request: Request, flow_frame_required: bool = True):
+    """Parse a JSON flow, or a frame stream of one flow frame followed by input frames
+
+    Runs of a registered flow may leave out the flow frame and send input frames only.
+    """
+    if not request.headers.get("content-type", "").startswith(FRAMES_MEDIA_TYPE):
+        body = await request.body()
+        return (json.loads(body) if body else {}), {}
+
+    frames = list(iter_frames(await request.body()))
+    if frames and frames[0][0].get("kind") == "flow":
+        data = json.loads(bytes(frames.pop(0)[1]))
+    elif flow_frame_required:
+        raise ProcessingError("Frame stream must start with a flow frame")
+    else:
+        data = {}
+
+    binary_inputs = await decode_input_frames(frames, data.setdefault("inputValues", {}))
+    return data, binary_inputs
+
+
+async def decode_input_frames(frames, input_values: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode input frames to node values; input_values gets each payload's fingerprint"""
+    binary_inputs = {}
+    for header, payload in frames:
+        node_id = header.get("input")
+        binary_inputs[node_id] = await run_blocking(
+            decode_binary_input, header, payload, decode_image_bytes
+        )
+        # Cache fingerprints hash the encoded payload, not the decoded pixels
+        input_values[node_id] = payload_fingerprint(payload)
+    return binary_inputs
+
+
+def number_field(data: Dict[str, Any], key: str, default: Any, minimum: float = 0,
+                 integer: bool = False, node_id: Optional[str] = None) -> Any:
+    """A numeric request field at or above minimum; anything else is a ProcessingError"""
+    value = data.get(key)
+    if value is None:
+        return default
+    kind = "an integer" if integer else "a number"
+    numeric = isinstance(value, int if integer else (int, float)) and not isinstance(value, bool)
+    if not (numeric and math.isfinite(value) and value >= minimum):
+        raise ProcessingError(f"{key} must be {kind} of at least {minimum}", node_id=node_id)
+    return value
+
+
+class FlowExecution:
+    """One run of a compiled plan: input decoding, result cache, scheduling and result encoding"""
+
+    def __init__(
+        self,
+        plan: FlowPlan,
+        input_values: Dict[str, Any],
+        node_values: Dict[str, Any],
+        writer,
+        use_cache: bool = True,
+        stream_intermediate: bool = False,
+        max_parallel: Optional[int] = None,
+        default_encoding: Optional[EncodingOptions] = None,
+        result_encodings: Optional[Dict[str, EncodingOptions]] = None,
+        tag: Optional[Dict[str, Any]] = None,
+        keep_full_results: bool = True,
+        emit_telemetry: bool = False,
+        node_timeout: float = NODE_TIMEOUT,
+        timeout: float = FLOW_TIMEOUT,
+    ):
+        # Streaming every node's output needs the nodes a fused chain would hide
+        self.plan = plan.unfused if stream_intermediate and plan.unfused is not None else plan
+        # Raw values are fingerprinted, resolved ones (decoded arrays) are computed on
+        self.input_values = input_values
+        self.node_values = node_values
+        self.writer = writer
+        self.use_cache = RESULT_CACHE.enabled and use_cache
+        self.stream_intermediate = stream_intermediate
+        self.max_parallel = max_parallel
+        self.default_encoding = default_encoding or EncodingOptions()
+        self.result_encodings = result_encodings or {}
+        # Extra keys added to every streamed header, e.g. the image name in a batch
+        self.tag = tag or {}
+        self.keep_full_results = keep_full_results
+        # Stream a telemetry line per node; records are kept (and exported to /metrics) regardless
+        self.emit_telemetry = emit_telemetry
+        # Seconds; a node's own "timeout" in its data overrides node_timeout, 0 means unlimited
+        self.node_timeout = node_timeout
+        self.timeout = timeout
+        self.telemetry: Dict[str, NodeTelemetry] = {}
+        self.run: Optional[FlowRun] = None
+        self.run_id = uuid.uuid4().hex
+
+        self.fingerprints: Dict[str, str] = {}
+        self.cache_stats = {"hits": 0, "misses": 0}
+        self._stats_lock = threading.Lock()
+        # Image inputs are decoded once per run and shared read-only by all consumers
+        self._decoded_inputs = RunMemo()
+        self._completed_count = itertools.count(1)
+
+    @classmethod
+    def from_request(
+        cls, plan: FlowPlan, data: Dict[str, Any], binary_inputs: Dict[str, Any], writer, **kwargs
+    ) -> "FlowExecution":
+        """Execution configured from request fields; kwargs override them"""
+        input_values = data.get("inputValues", {})
+        node_values = resolve_image_refs(input_values)
+        node_values.update(binary_inputs)
+
+        # Request-wide result encoding, optionally overridden per result node id
+        default_encoding = EncodingOptions.from_dict(data.get("resultEncoding"))
+        result_encodings = {
+            node_id: EncodingOptions.from_dict(options, base=default_encoding)
+            for node_id, options in (data.get("resultEncodings") or {}).items()
+        }
+        options = dict(
+            use_cache=data.get("useCache", True),
+            stream_intermediate=bool(data.get("streamIntermediate")),
+            emit_telemetry=bool(data.get("telemetry")),
+            max_parallel=number_field(data, "maxParallel", None, minimum=1, integer=True),
+            node_timeout=float(number_field(data, "nodeTimeout", NODE_TIMEOUT)),
+            timeout=float(number_field(data, "timeout", FLOW_TIMEOUT)),
+            default_encoding=default_encoding,
+            result_encodings=result_encodings,
+        )
+        options.update(kwargs)
+        return cls(plan, input_values, node_values, writer, **options)
+
+    async def prepare(self):
+        if self.use_cache:
+            # Fingerprint the raw inputs: an image reference is cheaper to hash than its pixels
+            self.fingerprints = await run_blocking(fingerprint_plan, self.plan, self.input_values)
+
+    def run_node(self, node_id: str, owned: Set[str] = frozenset()) -> Any:
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        hit = False
+        if self.use_cache:
+            hit, value = RESULT_CACHE.get(self.fingerprints[node_id])
+            with self._stats_lock:
+                self.cache_stats["hits" if hit else "misses"] += 1
+            NODE_CACHE.inc("hit" if hit else "miss")
+
+        if not hit:
+            value = self.compute_node(node_id, owned)
+            if self.use_cache and value is not None:
+                RESULT_CACHE.put(self.fingerprints[node_id], value)
+
+        record = NodeTelemetry(
+            node_id,
+            self.plan.nodes[node_id]["data"].get("func"),
+            time.perf_counter() - started,
+            time.thread_time() - cpu_started,
+            value,
+            cached=hit,
+        )
+        self.telemetry[node_id] = record
+        record_node(record)
+        return value
+
+    def _decode_input(self, src_id: str) -> np.ndarray:
+        image = decode_base64_image(self.node_values[src_id])
+        image.flags.writeable = False
+        return image
+
+    def decode_inputs(self):
+        """Decode every data-URL image input up front instead of on first use"""
+        for src_id, value in self.node_values.items():
+            if isinstance(value, str) and value.startswith("data:image"):
+                self._decoded_inputs.get(src_id, lambda: self._decode_input(src_id))
+
+    def node_inputs(self, node_id: str, owned: Set[str] = frozenset()) -> Dict[str, Any]:
+        """A node's inputs by handle; only buffers in owned are writable, the rest read-only views"""
+        edges = self.plan.incoming.get(node_id, [])
+        feeds = Counter(edge["source"] for edge in edges)
+        input_dict = {}
         for edge in edges:
-            edge_map.setdefault(edge["target"], []).append(edge["source"])
+            src_id = edge["source"]
+            val = self.node_values.get(src_id)
+            if isinstance(val, str) and val.startswith("data:image"):
+                val = self._decoded_inputs.get(src_id, lambda: self._decode_input(src_id))
+            elif src_id not in owned or feeds[src_id] > 1:
+                val = read_only(val)
+            input_dict[edge.get("targetHandle") or src_id] = val
+        return input_dict
 
-        async def flow_processor():
-            pending_edges = list(edges)
+    def compute_node(self, node_id: str, owned: Set[str] = frozenset()) -> Any:
+        if node_id in self.plan.fused:
+            return self.compute_fused(node_id, owned)
+        input_dict = self.node_inputs(node_id, owned)
+        if not input_dict:
+            return None
+        func_name = self.plan.nodes[node_id]["data"].get("func")
+        # Inputs this node does not own arrive read-only, so all writable means all owned;
+        # a view may share its buffer with an array someone else still reads
+        inplace = all(
+            v.flags.writeable and v.base is None
+            for v in input_dict.values() if isinstance(v, np.ndarray)
+        )
+        return run_function_node(func_name, input_dict, inplace=inplace)
 
-            async def process_function_node(node_id: str):
-                if node_id in processed_nodes:
-                    return
+    def compute_fused(self, node_id: str, owned: Set[str]) -> Any:
+        """A fused chain as one cv2.LUT pass over a uint8 image, otherwise step by step"""
+        chain = self.plan.fused[node_id]
+        steps = []
+        for step_id, handle in chain:
+            inputs = self.node_inputs(step_id, owned)
+            steps.append((self.plan.nodes[step_id]["data"].get("func"), handle, inputs))
+        image = steps[0][2].get(chain[0][1])
 
-                node = next((n for n in nodes if n["id"] == node_id), None)
-                if not node or node["type"] != NODE_TYPE_FUNCTION:
-                    return
-                
-                incoming_edges = [e for e in edges if e["target"] == node_id]
-                
-
-                #### processing input ######
-                input_dict = {}
-                for edge in incoming_edges:
-                    src_id = edge["source"]
-                    target_handle = edge.get("targetHandle")
-
-                    if src_id not in node_values:
-                        src_node = next((n for n in nodes if n["id"] == src_id), None)
-                        if src_node and src_node.type == NODE_TYPE_FUNCTION:
-                            await process_function_node(src_id)
-                        elif src_node and src_node.type in [NODE_TYPE_INPUT,NODE_TYPE_IMAGE_INPUT,NODE_TYPE_DETECTION_RESULT]:
-                            node_values[src_id] = inputValues.get(src_id)
-
-                    val = node_values.get(src_id)
-                    if isinstance(val, str) and val.startswith("data:image"):
-                        val = decode_base64_image(val)
-
-                    if target_handle:
-                        input_dict[target_handle] = val
-                    else:
-                        input_dict[src_id] = val
-
-                if not input_dict:
-                    return
+        if isinstance(image, np.ndarray) and image.dtype == np.uint8 and image.size:
+            lut = chain_lut(REGISTRY, steps)
+            if lut is not None:
+                return apply_lut(image, lut, in_place=image.flags.writeable)
 
-                func_name = node["data"].get("func")
-                found = False
-                instance_cache = {}
-                for module in MODULES:
-                    for name, obj in vars(module).items():
-                        if inspect.isclass(obj) and func_name in vars(obj):
-                            try:
-                                method = getattr(obj, func_name)
-                                if callable(method):
-                                    sig = inspect.signature(method)
-                                    params = list(sig.parameters.keys())
-                                    args = [input_dict.get(p) for p in params if p != "self"]
-
-                                    if obj not in instance_cache:
-                                        instance_cache[obj] = obj() 
-                                    instance = instance_cache[obj]
-
-                                    result = method(instance, *args)
-                                    node_values[node_id] = result
-                                    
-                                    found = True
-                                    break
-                            except Exception as e:
-                                print(f"Error processing {func_name}: {e}")
-                                node_values[node_id] = None
-                                found = True
-                                break
-                        elif callable(obj) and name == func_name:
-                            try:
-                                sig = inspect.signature(obj)
-                                params = list(sig.parameters.keys())
-                                args = [input_dict.get(p) for p in params]
-                                result = obj(*args)
-                                node_values[node_id] = result
-                                found = True
-                                break
-                            except Exception as e:
-                                print(f"Error processing {func_name}: {e}")
-                                node_values[node_id] = None
-                                found = True
-                                break
-                    if found:
-                        break
-
-                processed_nodes.add(node_id)
+        value = image
+        for func_name, handle, inputs in steps:
+            value = run_function_node(func_name, dict(inputs, **{handle: value}))
+        return value
 
+    def encode_result(self, edge: Dict[str, Any], value: Any) -> Any:
+        header = dict(result_header(edge, self.plan), **self.tag)
+        full = value
+        if self.keep_full_results and isinstance(value, str) and value.startswith("data:image"):
+            # Input-fed results echo the data URL; the stored full resolution is the decoded image
+            src_id = edge["source"]
             try:
-                while pending_edges:
-                    to_remove = []
-                    for edge in pending_edges:
-                        target_node = next(
-                            (n for n in nodes if n["id"] == edge["target"]), None
-                        )
-                        if target_node and target_node["type"] in [NODE_TYPE_RESULT, NODE_TYPE_ROI_INPUT]:
-                            source_id = edge["source"]
-                            source_node = next(
-                                (n for n in nodes if n["id"] == source_id), None
-                            )
-                            if source_node and source_node["type"] == NODE_TYPE_FUNCTION:
-                                await process_function_node(source_id)
-                            result_value = processing_to_send_result(
-                                node_values.get(source_id, None)
-                            )
-                            if target_node["type"] == NODE_TYPE_ROI_INPUT:
-                            
-                                response_data = json.dumps(
-                                {NODE_TYPE_ROI_INPUT: edge["target"], "value": result_value},
-                                )
-                            else:
-                                response_data = json.dumps(
-                                    {NODE_TYPE_RESULT: edge["target"], "value": result_value},
-                                )
-                            yield response_data + "\n"
-                            to_remove.append(edge)
-
-                    for edge in to_remove:
-                        pending_edges.remove(edge)
-
-                    await asyncio.sleep(0.1)
-
-                yield json.dumps({"message": "All results processed"}) + "\n"
+                full = self._decoded_inputs.get(src_id, lambda: self._decode_input(src_id))
+            except ProcessingError:
+                full = None
+        if self.keep_full_results and is_image_array(full):
+            # Previews may be downscaled; the full-resolution array stays fetchable unless
+            # it does not fit in the store's byte budget
+            if RESULTS_STORE.put(f"{self.run_id}/{edge['target']}", full):
+                header["full"] = f"/results/{self.run_id}/{edge['target']}"
+        options = self.result_encodings.get(edge["target"], self.default_encoding)
+        return self.writer.result(header, value, options)
 
-            except Exception as e:
-                yield json.dumps({"error": str(e)}) + "\n"
+    def encode_completed(self, node_id: str, value: Any) -> List[Any]:
+        lines = [
+            self.encode_result(edge, value)
+            for edge in self.plan.result_edges_by_source.get(node_id, [])
+        ]
+        if self.emit_telemetry:
+            lines.append(self.writer.message(dict(self.telemetry[node_id].to_dict(), **self.tag)))
+        if node_id == self.plan.probe:
+            header = dict({NODE_TYPE_FUNCTION: node_id}, **self.tag)
+            lines.append(self.writer.result(header, value, self.default_encoding))
+        elif self.stream_intermediate:
+            header = dict(
+                {
+                    NODE_TYPE_FUNCTION: node_id,
+                    "progress": [next(self._completed_count), len(self.plan.order)],
+                },
+                **self.tag,
+            )
+            lines.append(self.writer.result(header, value, self.default_encoding))
+        return lines
 
-        return StreamingResponse(flow_processor(), media_type="application/json")
-    
+    def summary(self) -> Dict[str, Any]:
+        summary = dict({"message": "All results processed", "runId": self.run_id}, **self.tag)
+        if self.use_cache:
+            summary["cache"] = self.cache_stats
+        if self.run is not None:
+            summary["memory"] = self.run.memory()
+        return summary
+
+    def start_run(self, **kwargs) -> FlowRun:
+        """Create and start the scheduler for this execution with its time budgets"""
+        node_timeouts = {}
+        for node_id in self.plan.order:
+            budget = float(self.plan.nodes[node_id]["data"].get("timeout") or self.node_timeout)
+            if budget > 0:
+                node_timeouts[node_id] = budget
+        self.run = FlowRun(
+            self.plan,
+            self.node_values,
+            self.run_node,
+            max_parallel=self.max_parallel,
+            node_timeouts=node_timeouts,
+            timeout=self.timeout,
+            **kwargs,
+        )
+        self.run.start(asyncio.get_running_loop())
+        return self.run
+
+    def _finish_run(self, mode: str, started: float):
+        FLOW_SECONDS.observe(mode, value=time.perf_counter() - started)
+        FLOW_PEAK_BYTES.observe(value=self.run.peak_bytes)
+
+    async def stream(self):
+        """Encoded result lines as their source nodes complete, then a summary"""
+        started = time.perf_counter()
+        try:
+            # Results fed straight from input nodes are ready before anything runs
+            for edge in self.plan.result_edges:
+                if self.plan.nodes[edge["source"]]["type"] != NODE_TYPE_FUNCTION:
+                    yield await run_blocking(
+                        self.encode_result, edge, self.node_values.get(edge["source"])
+                    )
+
+            # Results are encoded as each node completes, so no output outlives its consumers
+            self.start_run(on_complete=self.encode_completed)
+            # Each completion event already carries its encoded lines
+            async for _, lines in self.run.completed_async():
+                for line in lines:
+                    yield line
+
+            self._finish_run("stream", started)
+            yield self.writer.message(self.summary())
+
+        except Exception as e:
+            error = {"error": str(e)}
+            if getattr(e, "node_id", None) is not None:
+                error["node_id"] = e.node_id
+            yield self.writer.message(dict(error, **self.tag))
+        finally:
+            # The client went away (or a budget ran out): stop scheduling nodes nobody will read
+            if self.run is not None:
+                self.run.cancel()
+
+    async def compute(self) -> Dict[str, Any]:
+        """Run every planned node without encoding; returns the values results are encoded from"""
+        started = time.perf_counter()
+        retain = {edge["source"] for edge in self.plan.result_edges}
+        if self.plan.probe is not None:
+            retain.add(self.plan.probe)
+        self.start_run(retain=retain)
+        try:
+            async for _ in self.run.completed_async():
+                pass
+        finally:
+            self.run.cancel()
+        self._finish_run("compute", started)
+        return self.node_values
+
+    def encode_results(self) -> List[Any]:
+        """Encoded lines for every result edge of a computed run"""
+        lines = [
+            self.encode_result(edge, self.node_values.get(edge["source"]))
+            for edge in self.plan.result_edges
+        ]
+        if self.plan.probe is not None:
+            header = dict({NODE_TYPE_FUNCTION: self.plan.probe}, **self.tag)
+            value = self.node_values.get(self.plan.probe)
+            lines.append(self.writer.result(header, value, self.default_encoding))
+        if self.emit_telemetry:
+            lines.extend(
+                self.writer.message(dict(self.telemetry[node_id].to_dict(), **self.tag))
+                for node_id in self.plan.order
+            )
+        return lines
+
+    def timed_encode_results(self) -> Tuple[float, float]:
+        """Encode every result edge as encode_results does; returns (encode, serialize) seconds"""
+        encode_time = serialize_time = 0.0
+        for edge in self.plan.result_edges:
+            value = self.node_values.get(edge["source"])
+            options = self.result_encodings.get(edge["target"], self.default_encoding)
+            started = time.perf_counter()
+            encoded = self.writer.encode(value, options)
+            encoded_at = time.perf_counter()
+            self.writer.serialize(result_header(edge, self.plan), encoded)
+            encode_time += encoded_at - started
+            serialize_time += time.perf_counter() - encoded_at
+        return encode_time, serialize_time
+
+    def encode_all(self) -> List[Any]:
+        """Encoded results of a computed run, then the summary"""
+        return self.encode_results() + [self.writer.message(self.summary())]
+
+
+async def execution_lines(execution: FlowExecution):
+    await execution.prepare()
+    async for line in execution.stream():
+        yield line
+
+
+async def _disconnected(request: Request):
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def until_disconnect(request: Request, lines):
+    """Pass lines through, closing them as soon as the client disconnects
+
+    The response itself only notices a gone client on its next write, which can be a long
+    node later; closing the lines cancels the run behind them right away.
+    """
+    disconnected = asyncio.ensure_future(_disconnected(request))
+    next_line = None
+    try:
+        while True:
+            next_line = asyncio.ensure_future(lines.__anext__())
+            await asyncio.wait({next_line, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_line.done():
+                return
+            try:
+                line = next_line.result()
+            except StopAsyncIteration:
+                return
+            yield line
+    finally:
+        disconnected.cancel()
+        # The response may cancel this generator while a line is still pending; lines cannot
+        # be closed while that read is running inside them
+        if next_line is not None and not next_line.done():
+            next_line.cancel()
+            await asyncio.gather(next_line, return_exceptions=True)
+        await lines.aclose()
+
+
+async def stream_execution(
+    request: Request, execution: FlowExecution, graph_id: str, data: Dict[str, Any]
+):
+    """Stream a run, sharing it with identical requests that arrive while it is in flight
+
+    Runs with side effects (non-cacheable functions) or "coalesce": false always run alone.
+    A new run waits for an admission slot at the request's "priority" first; joining one
+    that is already running does not need a slot.
+    """
+    media_type = execution.writer.media_type
+    shareable = data.get("coalesce", True) and all(
+        spec is None or spec.cacheable
+        for spec in (REGISTRY.get(execution.plan.nodes[n]["data"].get("func")) for n in execution.plan.order)
+    )
+    if shareable:
+        key = await run_blocking(coalescing_key, graph_id, data, media_type)
+        lines = IN_FLIGHT.subscribe(key)
+        if lines is not None:
+            FLOW_COALESCED.inc("joined")
+            return StreamingResponse(until_disconnect(request, lines), media_type=media_type)
+    else:
+        # A key nobody else has; the run still goes through IN_FLIGHT so its slot is always freed
+        key = uuid.uuid4().hex
+
+    ticket = await ADMISSION.acquire(data.get("priority", DEFAULT_PRIORITY))
+    # An identical run may have started while this one waited for its slot
+    lines, joined = IN_FLIGHT.join(key, lambda: execution_lines(execution), cleanup=ticket.release)
+    if joined:
+        ticket.release()
+    FLOW_COALESCED.inc("joined" if joined else "started" if shareable else "alone")
+    return StreamingResponse(until_disconnect(request, lines), media_type=media_type)
+
+
+@app.post("/execute_flow")
+async def execute_flow(request: Request):
+    try:
+        data, binary_inputs = await read_flow_request(request)
+        plan = compile_request(data)
+        check_functions(plan)
+        writer = writer_for(request.headers.get("accept"))
+        execution = FlowExecution.from_request(plan, data, binary_inputs, writer)
+        return await stream_execution(request, execution, graph_id_for(data), data)
+
+    except (ProcessingError, OverloadedError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def compile_request(data: Dict[str, Any]) -> FlowPlan:
+    """Compile a request's flow; chains of pointwise nodes are fused unless "fuse" is false"""
+    plan = compile_flow(
+        data.get("nodes", []),
+        data.get("edges", []),
+        targets=data.get("targets"),
+        evaluate_up_to=data.get("evaluateUpTo"),
+    )
+    return fuse_pointwise(plan, REGISTRY) if data.get("fuse", True) else plan
+
+
+def check_functions(plan: FlowPlan):
+    """Reject function nodes that name no registered function or edges into no parameter"""
+    for node_id in (step_id for n in plan.order for step_id in plan.steps(n)):
+        func_name = plan.nodes[node_id]["data"].get("func")
+        spec = REGISTRY.get(func_name)
+        if spec is None:
+            raise ProcessingError(f"Unknown function '{func_name}'", node_id=node_id)
+        number_field(plan.nodes[node_id]["data"], "timeout", None, node_id=node_id)
+        for edge in plan.incoming.get(node_id, []):
+            handle = edge.get("targetHandle")
+            if handle is not None and handle not in spec.params:
+                raise ProcessingError(
+                    f"Edge from '{edge['source']}' targets handle '{handle}', "
+                    f"which is not a parameter of '{func_name}'",
+                    node_id=node_id,
+                )
+
+
+@app.post("/flows")
+async def register_flow(request: Request):
+    """Validate and compile a flow once; run it later with POST /flows/{flowId}/run"""
+    data = await request.json()
+    plan = compile_request(data)
+    check_functions(plan)
+    # Surface bad encoding options now rather than on every run
+    EncodingOptions.from_dict(data.get("resultEncoding"))
+
+    flow_id = flow_id_for(data)
+    FLOW_STORE.put(RegisteredFlow(flow_id, plan, run_defaults(data)))
+    inputs = sorted(
+        node_id for node_id, node in plan.nodes.items()
+        if node["type"] in (NODE_TYPE_INPUT, NODE_TYPE_IMAGE_INPUT)
+    )
+    return {
+        "flowId": flow_id,
+        "inputs": inputs,
+        "results": sorted({edge["target"] for edge in plan.result_edges}),
+    }
+
+
+@app.post("/flows/{flow_id}/run")
+async def run_registered_flow(flow_id: str, request: Request):
+    """Run a registered flow; the body carries input values (and run options) only"""
+    flow = FLOW_STORE.get(flow_id)
+    if flow is None:
+        raise HTTPException(status_code=404, detail="Unknown flow id")
+    data, binary_inputs = await read_flow_request(request, flow_frame_required=False)
+    for node_id in itertools.chain(data.get("inputValues") or {}, binary_inputs):
+        if node_id not in flow.plan.nodes:
+            raise ProcessingError("Input does not match any node of the flow", node_id=node_id)
+
+    writer = writer_for(request.headers.get("accept"))
+    data = flow.run_request(data)
+    execution = FlowExecution.from_request(flow.plan, data, binary_inputs, writer)
+    return await stream_execution(request, execution, flow.flow_id, data)
+
+
+@app.delete("/flows/{flow_id}")
+async def delete_flow(flow_id: str):
+    if not FLOW_STORE.delete(flow_id):
+        raise HTTPException(status_code=404, detail="Unknown flow id")
+    return {"deleted": flow_id}
+
+
+@app.post("/profile_flow")
+async def profile_flow(request: Request):
+    """Run a flow repeatedly and report latency percentiles per node, per phase and end to end
+
+    Body: a flow (or "flowId" of a registered one) with its inputs, plus "runs" (default 20)
+    and "warmup" (default 3) runs that are executed but not measured. The result cache is
+    bypassed so every run does the full work.
+    """
+    data, binary_inputs = await read_flow_request(request)
+    runs = int(data.get("runs", 20))
+    warmup = int(data.get("warmup", 3))
+    if not 1 <= runs <= MAX_PROFILE_RUNS or warmup < 0:
+        raise ProcessingError(f"runs must be between 1 and {MAX_PROFILE_RUNS}, warmup at least 0")
+
+    if data.get("flowId"):
+        flow = FLOW_STORE.get(data["flowId"])
+        if flow is None:
+            raise HTTPException(status_code=404, detail="Unknown flow id")
+        plan, data = flow.plan, flow.run_request(data)
+    else:
+        plan = compile_request(data)
+        check_functions(plan)
+
+    writer = writer_for(request.headers.get("accept"))
+    profile = FlowProfile(plan)
+    # One slot for all runs, so queueing behind other requests never shows up as latency
+    ticket = await ADMISSION.acquire(data.get("priority", DEFAULT_PRIORITY))
+    try:
+        for index in range(warmup + runs):
+            execution = FlowExecution.from_request(
+                plan, data, binary_inputs, writer, use_cache=False, keep_full_results=False
+            )
+            started = time.perf_counter()
+            await run_blocking(execution.decode_inputs)
+            decoded_at = time.perf_counter()
+            await execution.compute()
+            executed_at = time.perf_counter()
+            encode_time, serialize_time = await run_blocking(execution.timed_encode_results)
+            if index < warmup:
+                continue
+            profile.add_run(
+                {
+                    "decode": decoded_at - started,
+                    "execute": executed_at - decoded_at,
+                    "encode": encode_time,
+                    "serialize": serialize_time,
+                },
+                {node_id: record.wall for node_id, record in execution.telemetry.items()},
+            )
+    finally:
+        ticket.release()
+    return profile.report()
+
+
+@app.websocket("/flows/{flow_id}/live")
+async def live_flow(websocket: WebSocket, flow_id: str):
+    """Stream frames through a registered flow, always processing the newest frame
+
+    Binary messages carry input frames (the /flows/{id}/run frame format); a frame that
+    arrives while another is waiting replaces it, so latency never builds up. Text messages
+    carry JSON run options (inputValues, resultEncoding, ...) applied to later frames.
+    Frames are admitted at "live" priority unless the options name another.
+    Results come back as binary frames, or JSON text with ?results=json, each frame
+    closing with a stats message.
+    """
+    await websocket.accept()
+    flow = FLOW_STORE.get(flow_id)
+    if flow is None:
+        await websocket.close(code=1008, reason="Unknown flow id")
+        return
+
+    writer = NdjsonWriter() if websocket.query_params.get("results") == "json" else FrameWriter()
+    options = {"request": flow.run_request({})}
+    slot = LatestFrameSlot()
+    stats = StreamStats()
+    sequence = itertools.count(1)
+
+    async def send(line):
+        if isinstance(line, bytes):
+            await websocket.send_bytes(line)
+        else:
+            await websocket.send_text(line)
+
+    async def receive():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("bytes") is not None:
+                    stats.frame_received()
+                    slot.put((next(sequence), time.monotonic(), message["bytes"]))
+                elif message.get("text"):
+                    try:
+                        request_options = json.loads(message["text"])
+                        if not isinstance(request_options, dict):
+                            raise ValueError("expected a JSON object")
+                        options["request"] = flow.run_request(request_options)
+                    except (ValueError, ProcessingError) as e:
+                        await send(writer.message({"error": f"Invalid options: {e}"}))
+        finally:
+            slot.close()
+
+    async def run_frame(frame_id, data):
+        request_data = options["request"]
+        input_values = dict(request_data["inputValues"])
+        binary_inputs = await decode_input_frames(iter_frames(data), input_values)
+        execution = FlowExecution.from_request(
+            flow.plan,
+            dict(request_data, inputValues=input_values),
+            binary_inputs,
+            writer,
+            # Every frame is new, caching its intermediates would only evict useful entries
+            use_cache=request_data.get("useCache", False),
+            tag={"frame": frame_id},
+            keep_full_results=False,
+        )
+        ticket = await ADMISSION.acquire(request_data.get("priority", "live"))
+        try:
+            await execution.prepare()
+            await execution.compute()
+        finally:
+            ticket.release()
+        return await run_blocking(execution.encode_results)
+
+    async def process():
+        while True:
+            frame = await slot.take()
+            if frame is None:
+                return
+            frame_id, received_at, data = frame
+            stats.in_flight += 1
+            try:
+                lines = await run_frame(frame_id, data)
+                stats.frame_done(received_at)
+            except Exception as e:
+                lines = [writer.message({"error": str(e), "frame": frame_id})]
+                stats.frame_done(received_at, failed=True)
+            finally:
+                stats.in_flight -= 1
+            lines.append(
+                writer.message(
+                    {"message": "Frame processed", "frame": frame_id, "stats": stats.snapshot(slot)}
+                )
+            )
+            for line in lines:
+                await send(line)
+
+    receiver = asyncio.create_task(receive())
+    processor = asyncio.create_task(process())
+    try:
+        # The receiver only ends on disconnect; the frame in progress is then abandoned
+        done, _ = await asyncio.wait({receiver, processor}, return_when=asyncio.FIRST_COMPLETED)
+        if processor in done:
+            processor.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        processor.cancel()
+
+
+@app.post("/execute_batch")
+async def execute_batch(request: Request):
+    """Run one flow over every image of a local directory, glob or archive
+
+    Body: the usual flow fields plus "source" (path, glob or .zip/.tar), "imageInput"
+    (the input node that receives each image; defaults to the only image input node)
+    and optional "workers" and "priority" (default "batch"). Result lines carry an "image"
+    key naming their file.
+    """
+    data = await request.json()
+    source = data.get("source")
+    if not source:
+        raise ProcessingError("Batch request needs a source")
+    check_batch_source(source)
+
+    plan = compile_request(data)
+    check_functions(plan)
+    image_input = data.get("imageInput")
+    if image_input is None:
+        image_inputs = [
+            n for n, node in plan.nodes.items() if node["type"] == NODE_TYPE_IMAGE_INPUT
+        ]
+        if len(image_inputs) != 1:
+            raise ProcessingError("Batch request needs imageInput when the flow has several image inputs")
+        image_input = image_inputs[0]
+    elif image_input not in plan.nodes:
+        raise ProcessingError("imageInput does not match any node", node_id=image_input)
+
+    # Turn the batch away up front if the queue is full; its images then queue without a bound
+    priority = data.get("priority", "batch")
+    ADMISSION.check(priority)
+
+    writer = writer_for(request.headers.get("accept"))
+    template = FlowExecution.from_request(plan, data, {}, writer)
+    workers = max(1, int(data.get("workers") or NODE_WORKERS))
+    counts = {"images": 0, "errors": 0}
+
+    async def decode(item):
+        name, encoded = item
+        try:
+            image = await run_blocking(decode_image_bytes, encoded)
+        except Exception as e:
+            raise BatchItemError(name, str(e))
+        image.flags.writeable = False
+        return name, image, payload_fingerprint(memoryview(encoded))
+
+    async def compute(item):
+        name, image, fingerprint = item
+        execution = FlowExecution(
+            plan,
+            dict(template.input_values, **{image_input: fingerprint}),
+            dict(template.node_values, **{image_input: image}),
+            writer,
+            # Every image is new, caching its intermediates would only evict useful entries
+            use_cache=data.get("useCache", False),
+            max_parallel=template.max_parallel,
+            node_timeout=template.node_timeout,
+            timeout=template.timeout,
+            default_encoding=template.default_encoding,
+            result_encodings=template.result_encodings,
+            tag={"image": name},
+            keep_full_results=bool(data.get("keepFullResults")),
+        )
+        ticket = await ADMISSION.acquire(priority, shed=False)
+        try:
+            await execution.prepare()
+            await execution.compute()
+        except Exception as e:
+            raise BatchItemError(name, str(e))
+        finally:
+            ticket.release()
+        return execution
+
+    async def encode(execution):
+        try:
+            return await run_blocking(execution.encode_all)
+        except Exception as e:
+            raise BatchItemError(execution.tag["image"], str(e))
+
+    async def batch_processor():
+        outputs = run_pipeline(
+            iter_image_sources(source), decode, compute, encode, workers, queue_size=workers
+        )
+        async for output in outputs:
+            counts["images"] += 1
+            if isinstance(output, BaseException):
+                counts["errors"] += 1
+                yield writer.message(
+                    {"error": str(output), "image": getattr(output, "image", None)}
+                )
+                continue
+            for line in output:
+                yield line
+        yield writer.message(dict({"message": "Batch complete"}, **counts))
+
+    return StreamingResponse(until_disconnect(request, batch_processor()), media_type=writer.media_type)
+
+
+@app.post("/images")
+async def upload_image(request: Request):
+    """Decode an image once and keep it for later flows; body is raw image bytes or {"image": data URL}"""
+    if request.headers.get("content-type", "").startswith("application/json"):
+        body = await request.json()
+        encoded = base64_image_bytes(body.get("image", ""))
+    else:
+        encoded = await request.body()
+
+    ref = image_ref_for(encoded)
+    image = IMAGE_STORE.get(ref)
+    if image is None:
+        image = await run_blocking(decode_image_bytes, encoded)
+        if not IMAGE_STORE.put(ref, image):
+            raise HTTPException(status_code=413, detail="Image exceeds the image store budget")
+    return {"imageId": ref, "shape": list(image.shape), "expiresIn": IMAGE_STORE.ttl}
+
+
+@app.delete("/images/{image_id}")
+async def delete_image(image_id: str):
+    if not IMAGE_STORE.delete(image_id):
+        raise HTTPException(status_code=404, detail="Unknown image id")
+    return {"deleted": image_id}
+
+
+@app.get("/results/{run_id}/{node_id}")
+async def get_full_result(
+    run_id: str, node_id: str, format: str = "png", quality: int = 95
+):
+    """Full-resolution image for a result node of a recent run"""
+    value = RESULTS_STORE.get(f"{run_id}/{node_id}")
+    if value is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired result")
+    options = EncodingOptions(format=format, quality=quality, preview=False)
+    if options.format == "raw":
+        array = np.ascontiguousarray(value)
+        return Response(
+            content=array.tobytes(),
+            media_type="application/octet-stream",
+            headers={"X-Dtype": array.dtype.str, "X-Shape": ",".join(map(str, array.shape))},
+        )
+    fmt, encoded, _ = await run_blocking(encode_image, value, options)
+    return Response(content=encoded, media_type=f"image/{fmt}")
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-function latency histograms and counters in Prometheus text format"""
+    return Response(content=METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/function_dict")
 async def get_function_json():
     """Get detailed function dictionary from all modules"""
@@ -335,14 +1127,14 @@ async def update(data: DetectionRequest):
     print("this function was called")
     try:
         # Convert base64 image to numpy array
-        image_array = decode_base64_image(data.image)
-        return await detect_objects(data.model_name, image_array)
+        image_array = await run_blocking(decode_base64_image, data.image)
+        return await run_blocking(detect_objects, data.model_name, image_array)
     except Exception as e:
         return {"error": str(e)}
 
 
 
-async def detect_objects(model_name, image):
+def detect_objects(model_name, image):
     print("detecting objects")
     model = YOLO(model_name)
     print(model_name, image)
@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+
+# Byte budget for cached node outputs; 0 disables the cache
+CACHE_BYTES = int(os.environ.get("VISION_CACHE_BYTES", 512 * 1024 * 1024))
+
+
+def fingerprint_value(value: Any) -> str:
+    """Content hash of a raw input value (image data URL, number, list, ...)"""
+    digest = hashlib.sha1()
+    if isinstance(value, np.ndarray):
+        digest.update(f"ndarray:{value.dtype.str}:{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, str):
+        digest.update(b"str:" + value.encode())
+    else:
+        digest.update(json.dumps(value, sort_keys=True, default=repr).encode())
+    return digest.hexdigest()
+
+
+def node_fingerprint(func_name: str, inputs: Dict[str, str]) -> str:
+    """Key for a function node: its name plus the fingerprints feeding each input"""
+    digest = hashlib.sha1(f"func:{func_name}".encode())
+    for key in sorted(inputs):
+        digest.update(f"|{key}={inputs[key]}".encode())
+    return digest.hexdigest()
+
+
+def estimate_bytes(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_bytes(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_bytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+def freeze(value: Any) -> Any:
+    """Mark ndarrays read-only so a cached value cannot be modified by a consumer"""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            freeze(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            freeze(item)
+    return value
+
+
+class NodeResultCache:
+    """Thread-safe LRU of node outputs keyed by node fingerprint, bounded in bytes"""
+
+    def __init__(self, max_bytes: int = CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[0]
+
+    def put(self, key: str, value: Any):
+        size = estimate_bytes(value)
+        if size > self.max_bytes:
+            return
+        freeze(value)
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,71 @@
+from functions import  (imageFiltering, colorSpaceOperations, 
+                        geometric, calculation, contourAnalysis, 
+                        imageArithmetics, imageEnhancement, visualization, 
+                        roi,ArithmeticOperations, template_matching,ModelOperations
+                        )
+from registry import build_registry
+
+
+# List of modules containing functions to be exposed
+MODULES = [
+    ArithmeticOperations,
+    imageFiltering,
+    colorSpaceOperations,
+    geometric,
+    calculation,
+    contourAnalysis,
+    imageEnhancement,
+    imageArithmetics,
+    visualization,
+    roi,
+    template_matching,
+    ModelOperations
+]
+
+# Pure-Python loops that hold the GIL; run in worker processes when enabled
+PROCESS_PREFERRED = [
+    "region_growing",
+    "flood_fill",
+    "highlight_blobs_connected_components",
+    "draw_contour_diameters",
+]
+
+# Draw on or update their input arrays in place
+MUTATES_INPUTS = [
+    "putText",
+    "putRectangle",
+    "putCircle",
+    "putLine",
+    "draw_distance_on_image",
+    "draw_contours",
+    "draw_contour_diameters",
+    "watershed",
+    "accumulate_weighted",
+]
+
+# Side effects that must happen on every run
+NON_CACHEABLE = ["writeImage"]
+
+# Per-pixel uint8 -> uint8 maps; chains of them run as a single cv2.LUT pass
+POINTWISE = [
+    "brighten_image",
+    "darken_image",
+    "contrast_image",
+    "threshold_binary_image",
+    "inv_threshold_binary_image",
+    "threshold_truncate_image",
+    "threshold_to_zero_image",
+    "threshold_to_zero_inv_image",
+    "gamma_correction",
+    "power_law_transform",
+    "imageBitwiseNot",
+]
+
+# Resolved once at startup so node dispatch is a dict lookup
+REGISTRY = build_registry(
+    MODULES,
+    process_preferred=PROCESS_PREFERRED,
+    mutates_inputs=MUTATES_INPUTS,
+    non_cacheable=NON_CACHEABLE,
+    pointwise=POINTWISE,
+)
@@ -0,0 +1,111 @@
+import os
+import pickle
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable
+
+import numpy as np
+
+
+# 0 disables the process backend; process-preferred nodes then run on the thread pool
+PROCESS_WORKERS = int(os.environ.get("VISION_PROCESS_WORKERS", 0))
+
+_worker_registry = None
+
+
+def _can_share(value: Any) -> bool:
+    return isinstance(value, np.ndarray) and value.nbytes > 0 and value.dtype != object
+
+
+def _to_shared(array: np.ndarray):
+    """Copy array into a new shared memory block and describe it"""
+    shm = shared_memory.SharedMemory(create=True, size=array.nbytes)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, ("shm", shm.name, array.shape, array.dtype.str)
+
+
+def _attach(desc):
+    _, name, shape, dtype = desc
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _close(shm, unlink=False):
+    try:
+        shm.close()
+    except BufferError:
+        # A view is still referenced somewhere; the mapping goes away with it
+        pass
+    if unlink:
+        shm.unlink()
+
+
+def _init_worker(module_names):
+    global _worker_registry
+    from registry import build_registry
+
+    modules = [importlib.import_module(name) for name in module_names]
+    _worker_registry = build_registry(modules)
+
+
+def _run_in_worker(func_name: str, inputs: Dict[str, Any]):
+    attached = []
+    input_dict = {}
+    for key, value in inputs.items():
+        if isinstance(value, tuple) and value and value[0] == "shm":
+            shm, value = _attach(value)
+            attached.append(shm)
+        input_dict[key] = value
+
+    try:
+        result = _worker_registry.get(func_name).call(input_dict)
+        # Serialise before the input mappings are closed, results may be views of them
+        if _can_share(result):
+            out, desc = _to_shared(result)
+            out.close()
+        else:
+            desc = ("pickle", pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+    finally:
+        result = input_dict = None
+        for shm in attached:
+            _close(shm)
+    return desc
+
+
+class ProcessNodeRunner:
+    """Runs registered functions in worker processes, moving ndarrays through shared memory"""
+
+    def __init__(self, module_names: Iterable[str], workers: int = PROCESS_WORKERS):
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(sorted(set(module_names)),),
+        )
+
+    def call(self, func_name: str, input_dict: Dict[str, Any]) -> Any:
+        shared = []
+        inputs = {}
+        try:
+            for key, value in input_dict.items():
+                if _can_share(value):
+                    shm, value = _to_shared(value)
+                    shared.append(shm)
+                inputs[key] = value
+
+            desc = self.pool.submit(_run_in_worker, func_name, inputs).result()
+        finally:
+            for shm in shared:
+                _close(shm, unlink=True)
+
+        if desc[0] == "pickle":
+            return pickle.loads(desc[1])
+        shm, view = _attach(desc)
+        try:
+            return view.copy()
+        finally:
+            view = None
+            _close(shm, unlink=True)
+
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
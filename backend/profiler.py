@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from flow_plan import FlowPlan
+
+
+PHASES = ("decode", "execute", "encode", "serialize")
+
+# Upper bound on measured runs per profile request
+MAX_PROFILE_RUNS = 1000
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """Summary of durations in seconds, reported in milliseconds"""
+    values = np.asarray(samples, dtype=np.float64) * 1000
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "p50": round(float(p50), 3),
+        "p90": round(float(p90), 3),
+        "p99": round(float(p99), 3),
+        "mean": round(float(values.mean()), 3),
+        "min": round(float(values.min()), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def critical_path(plan: FlowPlan, durations: Dict[str, float]) -> Dict[str, Any]:
+    """Longest dependency chain through the plan, weighting each node by its duration"""
+    finish: Dict[str, float] = {}
+    previous: Dict[str, Any] = {}
+    for node_id in plan.order:
+        start, before = 0.0, None
+        for src_id in plan.upstream[node_id]:
+            if finish[src_id] > start:
+                start, before = finish[src_id], src_id
+        finish[node_id] = start + durations.get(node_id, 0.0)
+        previous[node_id] = before
+
+    if not finish:
+        return {"nodes": [], "ms": 0.0}
+    node_id = max(finish, key=finish.get)
+    total = finish[node_id]
+    path = []
+    while node_id is not None:
+        path.append(node_id)
+        node_id = previous[node_id]
+    return {"nodes": path[::-1], "ms": round(total * 1000, 3)}
+
+
+class FlowProfile:
+    """Durations collected over repeated runs of one plan"""
+
+    def __init__(self, plan: FlowPlan):
+        self.plan = plan
+        self.runs = 0
+        self.nodes: Dict[str, List[float]] = {node_id: [] for node_id in plan.order}
+        self.phases: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+        self.totals: List[float] = []
+
+    def add_run(self, phases: Dict[str, float], node_times: Dict[str, float]):
+        self.runs += 1
+        for phase in PHASES:
+            self.phases[phase].append(phases.get(phase, 0.0))
+        self.totals.append(sum(phases.values()))
+        for node_id, seconds in node_times.items():
+            self.nodes[node_id].append(seconds)
+
+    def report(self) -> Dict[str, Any]:
+        total_time = sum(self.totals) or 1.0
+        node_time = sum(sum(samples) for samples in self.nodes.values()) or 1.0
+        medians = {
+            node_id: float(np.median(samples))
+            for node_id, samples in self.nodes.items() if samples
+        }
+        nodes = {}
+        for node_id, samples in self.nodes.items():
+            if not samples:
+                continue
+            nodes[node_id] = dict(
+                percentiles(samples),
+                func=self.plan.nodes[node_id]["data"].get("func"),
+                share=round(sum(samples) / node_time, 4),
+            )
+        return {
+            "runs": self.runs,
+            "endToEnd": percentiles(self.totals),
+            "phases": {
+                phase: dict(percentiles(samples), share=round(sum(samples) / total_time, 4))
+                for phase, samples in self.phases.items()
+            },
+            "nodes": nodes,
+            # From median node times; parallel branches off this path do not add latency
+            "criticalPath": critical_path(self.plan, medians),
+        }
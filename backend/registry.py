@@ -0,0 +1,127 @@
+import inspect
+from types import FunctionType
+from typing import Any, Callable, Dict, List
+
+
+class FunctionSpec:
+    """A node function resolved once at startup: bound callable, parameters and defaults"""
+
+    def __init__(
+        self, name: str, module: str, qualname: str, func: Callable, instance: Any = None
+    ):
+        self.name = name
+        self.module = module
+        self.qualname = qualname
+        self.func = func
+        self.instance = instance
+        # GIL-bound pure-Python functions that should run in a worker process
+        self.prefer_process = False
+        # Draws on / updates its input arrays instead of allocating an output
+        self.mutates_inputs = False
+        # Side effects or non-reproducible output: never served from the result cache
+        self.cacheable = True
+        # Each uint8 output pixel depends only on the same input pixel: fusable into a LUT
+        self.pointwise = False
+
+        sig = inspect.signature(func)
+        # Keyword-only parameters are engine options, not node inputs
+        inputs = [
+            p for p in sig.parameters.values() if p.kind != inspect.Parameter.KEYWORD_ONLY
+        ]
+        self.params: List[str] = [p.name for p in inputs]
+        self.defaults: Dict[str, Any] = {
+            p.name: p.default for p in inputs if p.default is not inspect.Parameter.empty
+        }
+        # Copies its input by default, but can draw on it directly when told it owns it
+        self.inplace = "inplace" in sig.parameters and "inplace" not in self.params
+
+    def call(self, input_dict: Dict[str, Any], inplace: bool = False) -> Any:
+        """Call the function, filling unconnected parameters from their defaults
+
+        inplace is passed on to functions that take it; the caller must own the input arrays.
+        """
+        args = [
+            input_dict[p] if p in input_dict else self.defaults.get(p)
+            for p in self.params
+        ]
+        if inplace and self.inplace:
+            return self.func(*args, inplace=True)
+        return self.func(*args)
+
+
+class FunctionRegistry:
+    """Maps each node `func` name to its FunctionSpec"""
+
+    def __init__(self):
+        self.specs: Dict[str, FunctionSpec] = {}
+
+    def add(self, spec: FunctionSpec):
+        existing = self.specs.get(spec.name)
+        if existing is not None:
+            raise RuntimeError(
+                f"Function name collision: '{spec.name}' is defined by both "
+                f"{existing.qualname} and {spec.qualname}"
+            )
+        self.specs[spec.name] = spec
+
+    def get(self, name: str):
+        return self.specs.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.specs
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+
+def build_registry(
+    modules, process_preferred=(), mutates_inputs=(), non_cacheable=(), pointwise=()
+) -> FunctionRegistry:
+    """Collect the public functions of every class (and module-level function) in modules"""
+    registry = FunctionRegistry()
+    for module in modules:
+        for name, obj in vars(module).items():
+            if getattr(obj, "__module__", None) != module.__name__:
+                continue
+
+            if inspect.isclass(obj):
+                instance = obj()
+                for func_name in vars(obj):
+                    if func_name.startswith("__") or not callable(
+                        getattr(obj, func_name)
+                    ):
+                        continue
+                    # Methods written without `self` are called straight off the class
+                    params = list(inspect.signature(getattr(obj, func_name)).parameters)
+                    if params and params[0] == "self":
+                        func = getattr(instance, func_name)
+                    else:
+                        func = getattr(obj, func_name)
+                    registry.add(
+                        FunctionSpec(
+                            func_name,
+                            module.__name__,
+                            f"{module.__name__}.{name}.{func_name}",
+                            func,
+                            instance,
+                        )
+                    )
+            elif isinstance(obj, FunctionType):
+                registry.add(
+                    FunctionSpec(name, module.__name__, f"{module.__name__}.{name}", obj)
+                )
+
+    for names, attr, value in (
+        (process_preferred, "prefer_process", True),
+        (mutates_inputs, "mutates_inputs", True),
+        (non_cacheable, "cacheable", False),
+        (pointwise, "pointwise", True),
+    ):
+        for func_name in names:
+            if func_name not in registry:
+                raise RuntimeError(
+                    f"Function '{func_name}' marked {attr}={value} is not registered"
+                )
+            setattr(registry.get(func_name), attr, value)
+
+    return registry
@@ -0,0 +1,232 @@
+import os
+import sys
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from node_cache import estimate_bytes
+
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Node latencies range from sub-millisecond pointwise ops to multi-second model calls
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes; the peak so far where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def describe_value(value: Any) -> Tuple[str, Optional[List[int]]]:
+    """(dtype, shape) of a node output; containers report their type and length"""
+    if isinstance(value, np.ndarray):
+        return str(value.dtype), list(value.shape)
+    if isinstance(value, (list, tuple, dict)):
+        return type(value).__name__, [len(value)]
+    return type(value).__name__, None
+
+
+class NodeTelemetry:
+    """Timing and output description of one node execution"""
+
+    def __init__(self, node_id: str, func: str, wall: float, cpu: float, value: Any, cached: bool):
+        self.node_id = node_id
+        self.func = func
+        self.wall = wall
+        self.cpu = cpu
+        self.dtype, self.shape = describe_value(value)
+        self.bytes = estimate_bytes(value) if value is not None else 0
+        self.cached = cached
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "telemetry": self.node_id,
+            "func": self.func,
+            "wallMs": round(self.wall * 1000, 3),
+            "cpuMs": round(self.cpu * 1000, 3),
+            "dtype": self.dtype,
+            "shape": self.shape,
+            "bytes": self.bytes,
+            "cached": self.cached,
+        }
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, *label_values: str, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets=LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Per label set: per-bucket counts (not cumulative), sum, count
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *label_values: str, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._series.setdefault(
+                label_values, ([0] * (len(self.buckets) + 1), [0.0, 0])
+            )
+            counts[index] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, (total, count)) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    labels = _format_labels(self.labels, label_values, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.add(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.add(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+NODE_SECONDS = METRICS.histogram(
+    "vision_node_duration_seconds", "Wall time of node executions", ["function"]
+)
+NODE_CPU_SECONDS = METRICS.counter(
+    "vision_node_cpu_seconds_total", "CPU time of node executions on the calling thread", ["function"]
+)
+NODE_OUTPUT_BYTES = METRICS.counter(
+    "vision_node_output_bytes_total", "Bytes of node outputs produced", ["function"]
+)
+NODE_ERRORS = METRICS.counter(
+    "vision_node_errors_total", "Node executions that raised", ["function"]
+)
+NODE_CACHE = METRICS.counter(
+    "vision_node_cache_total", "Result cache lookups by outcome", ["result"]
+)
+FLOW_SECONDS = METRICS.histogram(
+    "vision_flow_duration_seconds", "Wall time of whole flow executions", ["mode"]
+)
+FLOW_COALESCED = METRICS.counter(
+    "vision_flow_requests_total", "Streamed flow requests by whether they started a run, joined one or ran alone", ["run"]
+)
+FLOW_PEAK_BYTES = METRICS.histogram(
+    "vision_flow_peak_output_bytes",
+    "Most node output bytes held at once during a flow execution",
+    buckets=tuple(2 ** n for n in range(20, 35)),
+)
+QUEUE_DEPTH = METRICS.gauge(
+    "vision_admission_queued", "Flow executions waiting for a slot", ["priority"]
+)
+QUEUE_RUNNING = METRICS.gauge(
+    "vision_admission_running", "Flow executions holding a slot"
+)
+QUEUE_WAIT = METRICS.histogram(
+    "vision_admission_wait_seconds", "Time flow executions waited for a slot", ["priority"]
+)
+QUEUE_REJECTED = METRICS.counter(
+    "vision_admission_rejected_total", "Flow executions turned away by admission control",
+    ["priority", "reason"],
+)
+
+
+def record_node(record: NodeTelemetry):
+    if record.cached:
+        # Cache hits would drag the latency histograms towards zero
+        return
+    NODE_SECONDS.observe(record.func, value=record.wall)
+    NODE_CPU_SECONDS.inc(record.func, amount=record.cpu)
+    NODE_OUTPUT_BYTES.inc(record.func, amount=record.bytes)
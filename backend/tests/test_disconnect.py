@@ -0,0 +1,78 @@
+import time
+import asyncio
+import threading
+
+import numpy as np
+
+import main
+from flow_plan import compile_flow
+from node_functions import REGISTRY
+from wire import NdjsonWriter
+
+
+NODE_SECONDS = 0.2
+
+
+class SilentClient:
+    """A request whose client never sends a disconnect; the server cancels the response instead"""
+
+    async def receive(self):
+        await asyncio.Event().wait()
+
+
+def slow_chain(length):
+    nodes = [
+        {"id": "img", "type": "imageInputNode", "data": {}},
+        {"id": "out", "type": "resultNode", "data": {}},
+    ]
+    edges = []
+    previous = "img"
+    for index in range(length):
+        node_id = f"n{index}"
+        nodes.append({"id": node_id, "type": "functionNode", "data": {"func": "gaussian_blur"}})
+        edges.append({"source": previous, "target": node_id, "targetHandle": "image"})
+        previous = node_id
+    edges.append({"source": previous, "target": "out"})
+    return compile_flow(nodes, edges)
+
+
+def test_cancelled_response_skips_queued_nodes(monkeypatch):
+    spec = REGISTRY.get("gaussian_blur")
+    started = []
+    lock = threading.Lock()
+
+    def slow_blur(image, *args):
+        with lock:
+            started.append(time.monotonic())
+        time.sleep(NODE_SECONDS)
+        return image.copy()
+
+    monkeypatch.setattr(spec, "func", slow_blur)
+
+    plan = slow_chain(4)
+    image = np.zeros((32, 32), dtype=np.uint8)
+    execution = main.FlowExecution.from_request(
+        plan, {"inputValues": {"img": "frame"}, "useCache": False}, {"img": image}, NdjsonWriter()
+    )
+
+    async def scenario():
+        lines = main.until_disconnect(SilentClient(), main.execution_lines(execution))
+
+        async def respond():
+            async for _ in lines:
+                pass
+
+        # Starlette cancels the body iterator when the client goes away mid-node
+        response = asyncio.ensure_future(respond())
+        await asyncio.sleep(NODE_SECONDS / 2)
+        response.cancel()
+        outcome = (await asyncio.gather(response, return_exceptions=True))[0]
+        # Long enough for the whole chain to finish had it not been cancelled
+        await asyncio.sleep(NODE_SECONDS * 5)
+        return outcome
+
+    outcome = asyncio.run(scenario())
+
+    assert isinstance(outcome, asyncio.CancelledError)
+    assert len(started) == 1
+    assert execution.run is not None and execution.run.cancelled
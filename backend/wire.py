@@ -0,0 +1,300 @@
+import os
+import json
+import base64
+import struct
+import hashlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from errors import ProcessingError
+
+
+# Negotiated with `Accept` (results) and `Content-Type` (inputs); NDJSON stays the default
+FRAMES_MEDIA_TYPE = "application/x-vision-frames"
+
+# Longest side of streamed previews; full resolution is fetched on demand
+PREVIEW_MAX_SIDE = int(os.environ.get("VISION_PREVIEW_MAX_SIDE", 1024))
+
+# Frame layout: u32 big-endian header length, UTF-8 JSON header, then header["size"] payload bytes
+_HEADER_LEN = struct.Struct(">I")
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    return value
+
+
+class EncodingOptions:
+    """How ndarray results are encoded: format, quality and preview downscaling"""
+
+    FORMATS = ("auto", "jpeg", "png", "webp", "raw")
+
+    def __init__(self, format="auto", quality=75, preview=True, max_side=PREVIEW_MAX_SIDE):
+        if format not in self.FORMATS:
+            raise ProcessingError(f"Unknown result encoding '{format}'")
+        self.format = format
+        self.quality = int(quality)
+        self.preview = bool(preview)
+        self.max_side = int(max_side)
+
+    @classmethod
+    def from_dict(cls, options: Optional[Dict[str, Any]], base=None) -> "EncodingOptions":
+        """Overlay request options (format, quality, preview, maxSide) on base"""
+        base = base or cls()
+        options = options or {}
+        return cls(
+            format=options.get("format", base.format),
+            quality=options.get("quality", base.quality),
+            preview=options.get("preview", base.preview),
+            max_side=options.get("maxSide", base.max_side),
+        )
+
+
+FULL_RESOLUTION = EncodingOptions(preview=False)
+
+_MIME_TYPES = {"jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+def _displayable(value: np.ndarray) -> np.ndarray:
+    """8-bit view of an image-shaped array; float/int outputs (Sobel, ...) are min-max scaled"""
+    if value.ndim == 3 and value.shape[2] == 1:
+        value = value[:, :, 0]
+    if value.dtype == np.uint8:
+        return value
+    if value.dtype == bool:
+        return value.astype(np.uint8) * 255
+    return cv2.normalize(value, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+
+def _is_binary_mask(image: np.ndarray) -> bool:
+    if image.ndim != 2:
+        return False
+    return cv2.countNonZero(cv2.inRange(image, 1, 254)) == 0
+
+
+def is_image_array(value: Any) -> bool:
+    return (
+        isinstance(value, np.ndarray)
+        and value.size > 0
+        and (value.ndim == 2 or (value.ndim == 3 and value.shape[2] in (1, 3, 4)))
+        and (value.dtype.kind in "uif" or value.dtype == bool)
+    )
+
+
+def encode_image(value: np.ndarray, options: EncodingOptions) -> Tuple[str, bytes, bool]:
+    """Encode an image-shaped array with cv2.imencode; returns (format, bytes, downscaled)"""
+    image = _displayable(value)
+    binary = _is_binary_mask(image)
+
+    downscaled = False
+    height, width = image.shape[:2]
+    if options.preview and max(height, width) > options.max_side:
+        scale = options.max_side / max(height, width)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        # Nearest keeps masks strictly binary so they still compress as PNG
+        interpolation = cv2.INTER_NEAREST if binary else cv2.INTER_AREA
+        image = cv2.resize(image, size, interpolation=interpolation)
+        downscaled = True
+
+    fmt = options.format
+    if fmt == "auto":
+        fmt = "png" if binary else "jpeg"
+
+    # Arrays are RGB(A) as decoded by PIL; cv2 writes BGR(A)
+    if image.ndim == 3:
+        if image.shape[2] == 4:
+            code = cv2.COLOR_RGBA2BGR if fmt == "jpeg" else cv2.COLOR_RGBA2BGRA
+        else:
+            code = cv2.COLOR_RGB2BGR
+        image = cv2.cvtColor(image, code)
+
+    if fmt == "jpeg":
+        params = [cv2.IMWRITE_JPEG_QUALITY, options.quality]
+    elif fmt == "webp":
+        params = [cv2.IMWRITE_WEBP_QUALITY, options.quality]
+    else:
+        params = [cv2.IMWRITE_PNG_COMPRESSION, 1]
+    ok, buffer = cv2.imencode("." + fmt, image, params)
+    if not ok:
+        raise ProcessingError(f"Failed to encode result as {fmt}")
+    return fmt, buffer.tobytes(), downscaled
+
+
+def _raw_data_url(value: np.ndarray) -> str:
+    array = np.ascontiguousarray(value)
+    shape = ",".join(str(d) for d in array.shape)
+    return (
+        f"data:application/x-ndarray;dtype={array.dtype.str};shape={shape};base64,"
+        + base64.b64encode(array.tobytes()).decode()
+    )
+
+
+def processing_to_send_result(value: Any, options: Optional[EncodingOptions] = None) -> str:
+    """Encode various types to base64 or JSON strings"""
+    options = options or EncodingOptions()
+    try:
+        if isinstance(value, np.ndarray):
+            if options.format == "raw" or not is_image_array(value):
+                return _raw_data_url(value)
+            fmt, encoded, _ = encode_image(value, options)
+            return f"data:{_MIME_TYPES[fmt]};base64," + base64.b64encode(encoded).decode()
+
+        if isinstance(value, (int, float, str)):
+            return str(value)
+
+        if isinstance(value, (list, dict)):
+            def convert(item):
+                if isinstance(item, np.ndarray):
+                    return item.tolist()
+                return item
+
+            if isinstance(value, list):
+                converted = [convert(i) for i in value]
+            else:
+                converted = {k: convert(v) for k, v in value.items()}
+
+            return json.dumps(converted)
+
+        return str(value)
+    except ProcessingError:
+        raise
+    except Exception:
+        raise ProcessingError("Failed to convert result")
+
+
+def pack_frame(header: Dict[str, Any], payload: bytes = b"") -> bytes:
+    header = dict(header, size=len(payload))
+    encoded = json.dumps(header).encode()
+    return _HEADER_LEN.pack(len(encoded)) + encoded + payload
+
+
+def iter_frames(data: bytes) -> Iterator[Tuple[Dict[str, Any], memoryview]]:
+    view = memoryview(data)
+    offset = 0
+    try:
+        while offset < len(view):
+            (header_len,) = _HEADER_LEN.unpack_from(view, offset)
+            offset += _HEADER_LEN.size
+            header = json.loads(bytes(view[offset:offset + header_len]))
+            offset += header_len
+            size = header.get("size", 0)
+            if offset + size > len(view):
+                raise ValueError("truncated payload")
+            yield header, view[offset:offset + size]
+            offset += size
+    except (struct.error, ValueError) as e:
+        raise ProcessingError(f"Malformed frame stream: {e}")
+
+
+def encode_binary_value(
+    value: Any, options: Optional[EncodingOptions] = None
+) -> Tuple[Dict[str, Any], bytes]:
+    """Describe and serialise a node value for a binary frame"""
+    options = options or EncodingOptions()
+    try:
+        if isinstance(value, np.ndarray):
+            if options.format != "raw" and is_image_array(value):
+                fmt, encoded, downscaled = encode_image(value, options)
+                return {"encoding": fmt, "downscaled": downscaled}, encoded
+            array = np.ascontiguousarray(value)
+            return (
+                {"encoding": "ndarray", "dtype": array.dtype.str, "shape": list(array.shape)},
+                array.tobytes(),
+            )
+
+        # Contours, keypoint arrays, ...: one buffer, per-item dtype and shape
+        if (
+            isinstance(value, (list, tuple))
+            and value
+            and all(isinstance(v, np.ndarray) for v in value)
+        ):
+            arrays = [np.ascontiguousarray(v) for v in value]
+            items = [{"dtype": a.dtype.str, "shape": list(a.shape)} for a in arrays]
+            return (
+                {"encoding": "ndarray_list", "items": items},
+                b"".join(a.tobytes() for a in arrays),
+            )
+
+        if isinstance(value, (list, tuple, dict)):
+            return {"encoding": "json"}, json.dumps(_to_json(value)).encode()
+
+        return {"encoding": "text"}, str(value).encode()
+    except ProcessingError:
+        raise
+    except Exception:
+        raise ProcessingError("Failed to convert result")
+
+
+def decode_binary_input(header: Dict[str, Any], payload: memoryview, decode_image) -> Any:
+    """Turn an input frame back into a node value"""
+    encoding = header.get("encoding")
+    if encoding == "image":
+        return decode_image(bytes(payload))
+    if encoding == "ndarray":
+        array = np.frombuffer(payload, dtype=np.dtype(header["dtype"]))
+        return array.reshape(header["shape"]).copy()
+    if encoding == "json":
+        return json.loads(bytes(payload))
+    if encoding == "text":
+        return bytes(payload).decode()
+    raise ProcessingError(f"Unknown input encoding '{encoding}'", node_id=header.get("input"))
+
+
+def payload_fingerprint(payload: memoryview) -> str:
+    return "frame:" + hashlib.sha1(payload).hexdigest()
+
+
+class NdjsonWriter:
+    """Default stream format: one JSON object per line, images as base64 data URLs"""
+
+    media_type = "application/json"
+
+    def encode(self, value: Any, options: Optional[EncodingOptions] = None) -> str:
+        return processing_to_send_result(value, options)
+
+    def serialize(self, header: Dict[str, Any], encoded: str) -> str:
+        return json.dumps(dict(header, value=encoded)) + "\n"
+
+    def result(
+        self, header: Dict[str, Any], value: Any, options: Optional[EncodingOptions] = None
+    ) -> str:
+        return self.serialize(header, self.encode(value, options))
+
+    def message(self, body: Dict[str, Any]) -> str:
+        return json.dumps(body) + "\n"
+
+
+class FrameWriter:
+    """Binary stream format: encoded image bytes and raw typed array buffers"""
+
+    media_type = FRAMES_MEDIA_TYPE
+
+    def encode(
+        self, value: Any, options: Optional[EncodingOptions] = None
+    ) -> Tuple[Dict[str, Any], bytes]:
+        return encode_binary_value(value, options)
+
+    def serialize(self, header: Dict[str, Any], encoded: Tuple[Dict[str, Any], bytes]) -> bytes:
+        description, payload = encoded
+        return pack_frame(dict(header, **description), payload)
+
+    def result(
+        self, header: Dict[str, Any], value: Any, options: Optional[EncodingOptions] = None
+    ) -> bytes:
+        return self.serialize(header, self.encode(value, options))
+
+    def message(self, body: Dict[str, Any]) -> bytes:
+        return pack_frame(body)
+
+
+def writer_for(accept: str):
+    return FrameWriter() if FRAMES_MEDIA_TYPE in (accept or "") else NdjsonWriter()
@@ -1,8 +1,13 @@
-import { useState } from "react";
+import { useRef, useState } from "react";
 
 export const useFlowExecution = (nodes, edges, inputs, setNodes) => {
   const [generatedCode, setGeneratedCode] = useState("");
+  const runController = useRef(null);
   const executeFlow = async () => {
+    // A new run supersedes the previous one; aborting it lets the backend stop its nodes
+    if (runController.current) runController.current.abort();
+    const controller = new AbortController();
+    runController.current = controller;
     const nodeValues = {};
 
     nodes.forEach(({ id, type }) => {
@@ -78,6 +83,7 @@ export const useFlowExecution = (nodes, edges, inputs, setNodes) => {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ nodes, edges, inputValues: nodeValues }),
+        signal: controller.signal,
       });
 
       const reader = response.body.getReader();
@@ -116,7 +122,7 @@ export const useFlowExecution = (nodes, edges, inputs, setNodes) => {
         }
       }
     } catch (error) {
-      console.error("Error executing flow:", error);
+      if (error.name !== "AbortError") console.error("Error executing flow:", error);
     }
   };
 